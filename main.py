@@ -1,14 +1,35 @@
 import requests
 import datetime
 import time
-import json
 import math
+import bisect
 import logging
+import hashlib
 import os
 import threading
-from tenacity import retry, wait_exponential, stop_after_attempt, after_log
+from contextlib import contextmanager
+import queue
+import socket
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+from zoneinfo import ZoneInfo
+import numpy as np # pip install numpy
+from numpy.lib.stride_tricks import sliding_window_view
+import orjson # pip install orjson
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import websocket # pip install websocket-client
-import pytz # pip install pytz
+try:
+    from numba import njit # pip install numba (opsional, mengompilasi kernel numerik ke kode native)
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    def njit(*args, **kwargs):
+        """Fallback tanpa Numba: fungsi dijalankan sebagai Python biasa."""
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
 
 # --- Konfigurasi Logging ---
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -27,102 +48,399 @@ DISCORD_WEBHOOK = "https://discord.com/api/webhooks/1392208407943184486/rTi7iaRd
 # Frekuensi analisis real-time (dalam detik) untuk live candle dan fallback
 REAL_TIME_SCAN_INTERVAL_SECONDS = 30 * 60 # Setiap 30 menit
 
-# Base URL untuk WebSocket Binance (Production)
-BINANCE_WS_URL = "wss://stream.binance.com:9443/ws"
+# Durasi tiap interval Binance (dalam detik) untuk menghitung progres live candle
+_INTERVAL_SECONDS = {
+    "1m": 60, "3m": 180, "5m": 300, "15m": 900, "30m": 1800,
+    "1h": 3600, "2h": 7200, "4h": 14400, "6h": 21600, "8h": 28800,
+    "12h": 43200, "1d": 86400, "3d": 259200, "1w": 604800, "1M": 2592000 # Approximation for 1M
+}
+
+# Base URL untuk WebSocket Binance (Production), endpoint combined stream: semua interval lewat satu koneksi
+BINANCE_WS_URL = "wss://stream.binance.com:9443/stream"
+KLINE_STREAMS = [f"{SYMBOL.lower()}@kline_{interval}" for interval in INTERVALS]
+# Opsi socket WebSocket tambahan: perbesar buffer terima agar burst pesan tidak tertahan di kernel
+# (TCP_NODELAY dan keepalive sudah dipasang websocket-client secara default)
+WS_SOCKET_OPTIONS = (
+    (socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024),
+)
+# Backoff reconnect WebSocket (detik): dimulai dari minimum, berlipat ganda hingga maksimum
+WS_RECONNECT_MIN_SECONDS = 1
+WS_RECONNECT_MAX_SECONDS = 60
 
 # Zona waktu untuk output
-TARGET_TIMEZONE = pytz.timezone('Asia/Jakarta') # WIB (UTC+7)
+TARGET_TIMEZONE = ZoneInfo('Asia/Jakarta') # WIB (UTC+7)
+
+# --- CANDLE STORAGE (SoA) ---
+def _ms_to_datetime(ms: int) -> datetime.datetime:
+    return datetime.datetime.fromtimestamp(ms / 1000, tz=datetime.timezone.utc)
+
+@functools.lru_cache(maxsize=64)
+def _format_wib(ms: int) -> str:
+    # Waktu disimpan sebagai epoch ms dan baru diubah ke datetime WIB saat ditampilkan.
+    # Di-cache: waktu buka/tutup candle per TF hanya berubah saat candle baru, jadi astimezone + strftime jarang diulang.
+    # Hanya untuk waktu candle; waktu sekarang (selalu unik) diformat langsung agar tidak mengusir entri cache
+    return _ms_to_datetime(ms).astimezone(TARGET_TIMEZONE).strftime('%Y-%m-%d %H:%M:%S')
+
+class Candle(NamedTuple):
+    """Satu candle sebagai record ringan (akses atribut, tanpa dict per candle)."""
+    time: int # Waktu pembukaan candle, epoch ms (UTC)
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+    close_time: int # Waktu penutupan candle, epoch ms (UTC)
+    is_final_bar: bool
+
+class CandleBuffer:
+    """
+    Menyimpan candle dalam layout structure-of-arrays: satu np.ndarray per field
+    (open/high/low/close/volume, open_time/close_time dalam epoch ms, dan mask is_final).
+
+    Array dialokasikan sekali dengan slack kecil; append cukup memajukan cursor dan
+    baris tertua dibuang dengan memajukan awal window. Detektor membaca slice
+    float64 yang kontigu (view, tanpa copy) lewat properti `open`, `high`, dst.
+    Properti candle (body, shadow, rasio) dihitung sekali untuk seluruh buffer dan di-cache;
+    update live candle hanya menghitung ulang baris terakhir. Swing point di-cache per (window, threshold) dan hanya diperpanjang
+    untuk candle baru; indeks disimpan absolut (termasuk candle yang sudah dibuang) agar tetap
+    valid saat window bergeser.
+    """
+    SLACK = 32
+
+    def __init__(self, limit: int):
+        self.limit = limit + 1 # limit candle historis + 1 slot untuk live candle
+        capacity = self.limit + self.SLACK
+        self._open = np.empty(capacity, dtype=np.float64)
+        self._high = np.empty(capacity, dtype=np.float64)
+        self._low = np.empty(capacity, dtype=np.float64)
+        self._close = np.empty(capacity, dtype=np.float64)
+        self._volume = np.empty(capacity, dtype=np.float64)
+        self._open_time = np.empty(capacity, dtype=np.int64) # Epoch ms (UTC)
+        self._close_time = np.empty(capacity, dtype=np.int64) # Epoch ms (UTC)
+        self._is_final = np.zeros(capacity, dtype=np.bool_)
+        self._start = 0
+        self._end = 0
+        self._evicted = 0 # Jumlah candle tertua yang sudah dibuang (offset indeks absolut)
+        self._props = None # Cache hasil get_candle_properties untuk seluruh buffer
+        self._close_cumsum = None # Prefix sum harga close untuk SMA O(1)
+        self._swings = {} # {(window, threshold): (swing_highs, swing_lows, next_index)} dengan indeks absolut
+        self.version = 0 # Naik setiap kali isi buffer berubah; dipakai sebagai kunci cache hasil analisis
+        self.readers = 0 # Jumlah scan yang sedang membaca buffer ini; jika > 0 penulis wajib copy-on-write
+
+    @classmethod
+    def from_klines(cls, rows: list, limit: int) -> "CandleBuffer":
+        """Membangun buffer dari baris klines mentah Binance dalam satu kali parsing NumPy."""
+        buf = cls(limit)
+        rows = rows[-buf.limit:]
+        n = len(rows)
+        if n == 0:
+            return buf
+        arr = np.asarray(rows, dtype=object)
+        ohlcv = arr[:, 1:6].astype(np.float64)
+        buf._open[:n] = ohlcv[:, 0]
+        buf._high[:n] = ohlcv[:, 1]
+        buf._low[:n] = ohlcv[:, 2]
+        buf._close[:n] = ohlcv[:, 3]
+        buf._volume[:n] = ohlcv[:, 4]
+        buf._open_time[:n] = arr[:, 0].astype(np.int64)
+        buf._close_time[:n] = arr[:, 6].astype(np.int64)
+        buf._is_final[:n] = True # Data dari REST API selalu final
+        buf._end = n
+        buf.recompute_props()
+        return buf
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    @property
+    def open(self) -> np.ndarray: return self._open[self._start:self._end]
+    @property
+    def high(self) -> np.ndarray: return self._high[self._start:self._end]
+    @property
+    def low(self) -> np.ndarray: return self._low[self._start:self._end]
+    @property
+    def close(self) -> np.ndarray: return self._close[self._start:self._end]
+    @property
+    def volume(self) -> np.ndarray: return self._volume[self._start:self._end]
+    @property
+    def open_time(self) -> np.ndarray: return self._open_time[self._start:self._end]
+    @property
+    def close_time(self) -> np.ndarray: return self._close_time[self._start:self._end]
+    @property
+    def is_final(self) -> np.ndarray: return self._is_final[self._start:self._end]
+
+    @property
+    def props(self) -> dict:
+        """Array properti candle untuk seluruh buffer (lihat get_candle_properties)."""
+        if self._props is None:
+            self.recompute_props()
+        return self._props
+
+    def recompute_props(self):
+        """Menghitung ulang semua properti candle dalam satu pass NumPy."""
+        self._props = get_candle_properties(self.open, self.high, self.low, self.close)
+
+    @property
+    def close_cumsum(self) -> np.ndarray:
+        """Prefix sum close dengan nol di depan: sum(close[a:b]) == close_cumsum[b] - close_cumsum[a]."""
+        if self._close_cumsum is None:
+            self._close_cumsum = np.concatenate(([0.0], np.cumsum(self.close)))
+        return self._close_cumsum
+
+    def props_at(self, i: int) -> dict:
+        return {key: values[i] for key, values in self.props.items()}
+
+    def append(self, open_time: int, o: float, h: float, l: float, c: float, v: float, close_time: int, is_final: bool):
+        if self._end == len(self._open): # Slack habis: geser window ke awal array (amortized O(1))
+            n = len(self)
+            for arr in (self._open, self._high, self._low, self._close, self._volume, self._open_time, self._close_time, self._is_final):
+                arr[:n] = arr[self._start:self._end]
+            self._start, self._end = 0, n
+        self._end += 1
+        if len(self) > self.limit: # Buang candle tertua
+            self._start += 1
+            self._evicted += 1
+        self._write_row(self._end - 1, open_time, o, h, l, c, v, close_time, is_final)
+        self._props = None
+        self._close_cumsum = None
+
+    def _write_row(self, i: int, open_time: int, o: float, h: float, l: float, c: float, v: float, close_time: int, is_final: bool):
+        """Menulis satu baris langsung ke slot array i."""
+        self._open[i], self._high[i], self._low[i], self._close[i], self._volume[i] = o, h, l, c, v
+        self._open_time[i], self._close_time[i], self._is_final[i] = open_time, close_time, is_final
+        self.version += 1
+
+    def _patch_last_row_caches(self):
+        """Memperbarui cache turunan hanya untuk baris terakhir (O(1)) setelah live candle ditimpa."""
+        i = self._end - 1
+        if self._props is not None:
+            for key, value in get_candle_properties(self._open[i], self._high[i], self._low[i], self._close[i]).items():
+                self._props[key][-1] = value
+        if self._close_cumsum is not None:
+            self._close_cumsum[-1] = self._close_cumsum[-2] + self._close[i]
+
+    def upsert(self, open_time: int, o: float, h: float, l: float, c: float, v: float, close_time: int, is_final: bool):
+        """Menimpa baris terakhir jika waktu pembukaan sama, atau menambahkan jika lebih baru."""
+        if len(self) and open_time == self._open_time[self._end - 1]:
+            # Update live candle: timpa slot terakhir di tempat, tanpa alokasi objek baru
+            self._invalidate_swings(self._evicted + len(self) - 1)
+            self._write_row(self._end - 1, open_time, o, h, l, c, v, close_time, is_final)
+            self._patch_last_row_caches()
+        elif not len(self) or open_time > self._open_time[self._end - 1]:
+            self.append(open_time, o, h, l, c, v, close_time, is_final)
+
+    def _invalidate_swings(self, changed_index: int):
+        """Membuang swing point yang jendelanya mencakup candle (indeks absolut) yang berubah."""
+        for key, (highs, lows, next_index) in self._swings.items():
+            first_affected = changed_index - key[0]
+            if next_index > first_affected:
+                self._swings[key] = ([s for s in highs if s[0] < first_affected],
+                                     [s for s in lows if s[0] < first_affected], first_affected)
+
+    def swing_points(self, window: int, threshold: float) -> tuple:
+        """Swing high/low signifikan (lihat get_significant_swing_points); hanya kandidat baru yang dihitung."""
+        return self.swing_points_multi(((window, threshold),))[(window, threshold)]
+
+    def swing_points_multi(self, settings) -> dict:
+        """Seperti swing_points, untuk beberapa setting (window, threshold) sekaligus dalam satu sweep."""
+        n = len(self)
+        offset = self._evicted
+        result, cached, starts = {}, {}, {}
+        for key in settings:
+            window = key[0]
+            if n < window * 2 + 1:
+                result[key] = ([], [])
+                continue
+            first = offset + window # Kandidat absolut pertama yang masih punya jendela lengkap
+            highs, lows, next_index = self._swings.get(key, ([], [], first))
+            if highs and highs[0][0] < first or lows and lows[0][0] < first: # Candle tertua sudah dibuang
+                highs = [s for s in highs if s[0] >= first]
+                lows = [s for s in lows if s[0] >= first]
+            cached[key] = (highs, lows)
+            starts[key] = max(next_index, first) - offset
+        new_points = _find_swing_points(self.high, self.low, starts) if starts else {}
+        for key, (highs, lows) in cached.items():
+            new_highs, new_lows = new_points[key]
+            highs = highs + [(i + offset, price) for i, price in new_highs]
+            lows = lows + [(i + offset, price) for i, price in new_lows]
+            self._swings[key] = (highs, lows, offset + n - key[0])
+            result[key] = ([(i - offset, price) for i, price in highs], [(i - offset, price) for i, price in lows])
+        return result
+
+    def copy(self) -> "CandleBuffer":
+        buf = CandleBuffer(self.limit - 1)
+        n = len(self)
+        for src, dst in ((self._open, buf._open), (self._high, buf._high), (self._low, buf._low), (self._close, buf._close),
+                         (self._volume, buf._volume), (self._open_time, buf._open_time), (self._close_time, buf._close_time),
+                         (self._is_final, buf._is_final)):
+            dst[:n] = src[self._start:self._end]
+        buf._end = n
+        buf._evicted = self._evicted
+        buf.version = self.version
+        # Cache turunan bisa sedang ditambah/di-rebind oleh thread scan (buffer dipin): ambil referensinya sekali
+        # dan iterasi salinan list item agar dict tidak berubah ukuran selama iterasi
+        swings, props, close_cumsum = list(self._swings.items()), self._props, self._close_cumsum
+        buf._swings = {key: (list(highs), list(lows), next_index) for key, (highs, lows, next_index) in swings}
+        if props is not None:
+            buf._props = {key: values.copy() for key, values in props.items()}
+        if close_cumsum is not None:
+            buf._close_cumsum = close_cumsum.copy()
+        return buf
+
+    def through_close_time(self, close_time: int) -> "CandleBuffer":
+        """
+        Buffer yang berakhir di candle dengan close_time tersebut: self jika candle itu sudah yang terakhir
+        (atau tidak ditemukan), selain itu salinan tanpa candle sesudahnya (mis. live candle berikutnya).
+        """
+        close_times = self.close_time
+        end = int(np.searchsorted(close_times, close_time, side="right"))
+        if end == len(self) or not end or close_times[end - 1] != close_time:
+            return self
+        buf = self.copy()
+        buf._invalidate_swings(buf._evicted + end)
+        buf._end = end
+        if buf._props is not None:
+            buf._props = {key: values[:end] for key, values in buf._props.items()}
+        if buf._close_cumsum is not None:
+            buf._close_cumsum = buf._close_cumsum[:end + 1]
+        return buf
+
+    def candle_at(self, i: int) -> Candle:
+        """Mengembalikan candle ke-i sebagai record Candle untuk kode yang membutuhkan satu candle utuh."""
+        n = len(self)
+        if i < 0: i += n
+        if not 0 <= i < n: raise IndexError("candle index out of range")
+        j = self._start + i
+        return Candle(
+            int(self._open_time[j]),
+            float(self._open[j]),
+            float(self._high[j]),
+            float(self._low[j]),
+            float(self._close[j]),
+            float(self._volume[j]),
+            int(self._close_time[j]),
+            bool(self._is_final[j])
+        )
 
 # Cache untuk menyimpan data klines lengkap (historis + update live) untuk analisis
-# Format: {interval: [candle_obj, ...]}
-_candle_data_cache = {interval: [] for interval in INTERVALS}
-# Cache untuk menyimpan candle yang sedang berjalan/live dari WebSocket
-_live_websocket_candle_data = {interval: None for interval in INTERVALS}
-# Cache untuk menyimpan waktu penutupan candle terakhir yang sudah diproses secara final
+# Format: {interval: CandleBuffer}; candle live dari WebSocket ditulis langsung ke slot terakhir
+_candle_data_cache = {interval: CandleBuffer(CANDLE_LIMIT[interval]) for interval in INTERVALS}
+# Cache untuk menyimpan waktu penutupan (epoch ms) candle terakhir yang sudah diproses secara final
 last_processed_final_candle_time = {interval: None for interval in INTERVALS}
+# Interval yang refresh REST + scan candle finalnya sedang berjalan di thread terpisah
+_final_refresh_pending = set()
 
-# Lock untuk mengakses _candle_data_cache agar aman dari race condition antara thread
+# Lock untuk mengakses _candle_data_cache agar aman dari race condition antara thread.
+# Hanya dipegang sebentar: scan bekerja pada snapshot buffer yang dipin (lihat _pinned_snapshot)
 data_cache_lock = threading.Lock()
+# Menserialkan scan sehingga cache turunan buffer dan _ta_cache hanya ditulis oleh satu scan
+_scan_lock = threading.Lock()
+
+@contextmanager
+def _pinned_snapshot():
+    """
+    Mengambil snapshot {interval: CandleBuffer} dan mem-pin setiap buffer selama blok berjalan.
+    Selama buffer dipin, on_message menulis ke salinan baru (copy-on-write) alih-alih menimpa
+    buffer yang sedang dibaca, sehingga analisis berjalan tanpa memegang data_cache_lock.
+    """
+    with data_cache_lock:
+        snapshot = dict(_candle_data_cache)
+        for candles in snapshot.values():
+            candles.readers += 1
+    try:
+        yield snapshot
+    finally:
+        with data_cache_lock:
+            for candles in snapshot.values():
+                candles.readers -= 1
+
+# Cache hasil detektor per TF: {interval: (buffer, buffer.version, (pa, cp, bos_choch, sr))}; sr sudah dalam bentuk _format_sr_levels
+_ta_cache = {}
+# Worker untuk menganalisis semua TF secara paralel dalam satu scan (khusus analisis, bukan I/O)
+_scan_executor = ThreadPoolExecutor(max_workers=len(INTERVALS), thread_name_prefix="scan")
 
 # --- BINANCE KLINE API ---
-@retry(wait=wait_exponential(multiplier=1, min=4, max=10), stop=stop_after_attempt(5), after=after_log(logger, logging.WARNING))
-def get_klines_rest(symbol: str, interval: str, limit: int) -> list:
+# Session persisten untuk semua HTTP keluar (api.binance.com dan webhook Discord): koneksi TCP/TLS
+# dipakai ulang antar request (keep-alive + gzip)
+REST_TIMEOUT = (3.05, 10) # (connect, read) dalam detik
+_session = requests.Session()
+_session.headers.update({"Accept-Encoding": "gzip"})
+# Retry REST Binance ditangani urllib3 di dalam adapter (tanpa decorator di jalur sukses): hanya error jaringan,
+# 5xx, dan 429 yang di-retry, dengan menghormati header Retry-After. 418 (IP diblokir) dan 4xx lain tidak di-retry.
+BINANCE_REST_RETRY = Retry(
+    total=4, # Maksimal 5 percobaan
+    backoff_factor=2, # Jeda 0, 4, 8, 16 detik antar percobaan
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=frozenset({"GET"}),
+    respect_retry_after_header=True,
+    raise_on_status=False # Setelah retry habis, response terakhir dikembalikan dan raise_for_status yang melapor
+)
+_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=0)) # Webhook Discord: tanpa retry
+_session.mount("https://api.binance.com/", HTTPAdapter(pool_connections=1, pool_maxsize=8, max_retries=BINANCE_REST_RETRY))
+# Worker terpisah untuk request REST (fetch awal dan refetch): request yang tertahan retry/Retry-After
+# tidak menempati worker _scan_executor yang dipakai scan
+_rest_executor = ThreadPoolExecutor(max_workers=len(INTERVALS), thread_name_prefix="rest")
+
+def get_klines_rest(symbol: str, interval: str, limit: int) -> CandleBuffer:
     """Mengambil data klines (candle) dari Binance API REST dengan retry."""
     url = f"https://api.binance.com/api/v3/klines?symbol={symbol}&interval={interval}&limit={limit}"
     try:
-        response = requests.get(url, timeout=10)
+        response = _session.get(url, timeout=REST_TIMEOUT) # Retry + Retry-After ditangani BINANCE_REST_RETRY
         response.raise_for_status() # Akan memunculkan HTTPError untuk status code 4xx/5xx
-        data = response.json()
+        data = orjson.loads(response.content)
         
         if not data:
             logger.warning(f"Tidak ada data klines yang diterima dari REST API untuk {symbol} - {interval}.")
-            return []
-
-        candles = []
-        for c in data:
-            candle = {
-                "time": datetime.datetime.fromtimestamp(c[0] / 1000, tz=pytz.utc), # Waktu pembukaan candle (UTC)
-                "open": float(c[1]),
-                "high": float(c[2]),
-                "low": float(c[3]),
-                "close": float(c[4]),
-                "volume": float(c[5]),
-                "close_time": datetime.datetime.fromtimestamp(c[6] / 1000, tz=pytz.utc), # Waktu penutupan candle (UTC)
-                "is_final_bar": True # Data dari REST API selalu final
-            }
-            candles.append(candle)
-        return candles
+            return CandleBuffer(limit)
+
+        return CandleBuffer.from_klines(data, limit)
     except requests.exceptions.RequestException as e:
         logger.error(f"Error fetching klines from REST API for {symbol} - {interval}: {e}")
-        raise # Re-raise for tenacity to catch
+        raise
 
 # --- UTILITIES ---
-def get_candle_properties(c: dict) -> dict:
-    """Menghitung properti dasar candle untuk analisis pola."""
-    body_abs = abs(c["close"] - c["open"])
-    full_range = c["high"] - c["low"]
-    upper_shadow = c["high"] - max(c["open"], c["close"])
-    lower_shadow = min(c["open"], c["close"]) - c["low"]
-    
-    if full_range == 0: # Hindari pembagian dengan nol
-        return {
-            "body_abs": body_abs,
-            "full_range": full_range,
-            "upper_shadow": upper_shadow,
-            "lower_shadow": lower_shadow,
-            "is_bullish": c["close"] > c["open"],
-            "is_bearish": c["close"] < c["open"],
-            "is_doji_like": True,
-            "body_to_range_ratio": 0,
-            "upper_shadow_to_range_ratio": 0,
-            "lower_shadow_to_range_ratio": 0
-        }
+def get_candle_properties(o, h, l, c) -> dict:
+    """
+    Menghitung properti dasar candle untuk analisis pola.
+    Menerima skalar (satu candle) maupun slice np.ndarray (banyak candle sekaligus).
+    """
+    body_abs = np.abs(c - o)
+    full_range = h - l
+    upper_shadow = h - np.maximum(o, c)
+    lower_shadow = np.minimum(o, c) - l
+    safe_range = np.where(full_range == 0, 1.0, full_range) # Hindari pembagian dengan nol; semua rasio menjadi 0
 
     return {
         "body_abs": body_abs,
         "full_range": full_range,
         "upper_shadow": upper_shadow,
         "lower_shadow": lower_shadow,
-        "is_bullish": c["close"] > c["open"],
-        "is_bearish": c["close"] < c["open"],
+        "is_bullish": c > o,
+        "is_bearish": c < o,
         # Diperbarui: sedikit melonggarkan kriteria doji
-        "is_doji_like": body_abs / full_range < 0.15, # Dari 0.1 menjadi 0.15
-        "body_to_range_ratio": body_abs / full_range,
-        "upper_shadow_to_range_ratio": upper_shadow / full_range,
-        "lower_shadow_to_range_ratio": lower_shadow / full_range
+        "is_doji_like": (full_range == 0) | (body_abs / safe_range < 0.15), # Dari 0.1 menjadi 0.15
+        "body_to_range_ratio": body_abs / safe_range,
+        "upper_shadow_to_range_ratio": upper_shadow / safe_range,
+        "lower_shadow_to_range_ratio": lower_shadow / safe_range
     }
 
-def get_trend_direction(candles: list, lookback_period: int = 10) -> str:
-    """Menentukan arah tren berdasarkan Simple Moving Average (SMA) yang sederhana."""
-    if len(candles) < lookback_period:
+def _props(c: Candle) -> dict:
+    return get_candle_properties(c.open, c.high, c.low, c.close)
+
+def get_trend_direction(candles: CandleBuffer, lookback_period: int = 10, end: int = None) -> str:
+    """
+    Menentukan arah tren berdasarkan Simple Moving Average (SMA) yang sederhana.
+    `end` membatasi candle yang dipakai seperti slice (mis. -1 = tanpa candle terakhir).
+    """
+    n = len(candles)
+    if end is not None:
+        n = max(0, n + end if end < 0 else min(end, n))
+    if n < lookback_period:
         return "Unknown"
     
-    closes = [c["close"] for c in candles[-lookback_period:]]
-    if len(closes) < lookback_period: # Pastikan ada cukup data
-        return "Unknown"
-
-    sma_prev = sum(closes[:-1]) / (lookback_period - 1)
-    sma_current = sum(closes) / lookback_period
+    cumsum = candles.close_cumsum
+    sma_prev = (cumsum[n - 1] - cumsum[n - lookback_period]) / (lookback_period - 1)
+    sma_current = (cumsum[n] - cumsum[n - lookback_period]) / lookback_period
 
     if sma_current > sma_prev:
         return "Uptrend"
@@ -131,21 +449,13 @@ def get_trend_direction(candles: list, lookback_period: int = 10) -> str:
     else:
         return "Sideways"
 
-def get_time_progress(candle_open_time: datetime.datetime, interval_str: str) -> float:
-    """Menghitung progres waktu candle yang sedang berjalan."""
-    now = datetime.datetime.utcnow().replace(tzinfo=pytz.utc)
-    
-    interval_seconds_map = {
-        "1m": 60, "3m": 180, "5m": 300, "15m": 900, "30m": 1800,
-        "1h": 3600, "2h": 7200, "4h": 14400, "6h": 21600, "8h": 28800,
-        "12h": 43200, "1d": 86400, "3d": 259200, "1w": 604800, "1M": 2592000 # Approximation for 1M
-    }
-    
-    interval_sec = interval_seconds_map.get(interval_str)
+def get_time_progress(candle_open_s: float, interval_str: str) -> float:
+    """Menghitung progres waktu candle yang sedang berjalan (waktu buka dalam detik epoch)."""
+    interval_sec = _INTERVAL_SECONDS.get(interval_str)
     if not interval_sec:
         return 0.0 # Unknown interval, cannot calculate progress
 
-    elapsed_time = (now - candle_open_time).total_seconds()
+    elapsed_time = time.time() - candle_open_s
     
     if elapsed_time <= 0: return 0.0 # Belum mulai atau waktu tidak valid
     if elapsed_time >= interval_sec: return 1.0 # Sudah melewati waktu penutupan
@@ -153,205 +463,266 @@ def get_time_progress(candle_open_time: datetime.datetime, interval_str: str) ->
     return elapsed_time / interval_sec
 
 # --- PRICE ACTION CANDLESTICK DETECTION ---
-# Diperbarui: Melonggarkan beberapa rasio body/shadow untuk deteksi lebih luas
-def is_bullish_engulfing(c1, c2, confirm_volume=False):
-    if not (c1["close"] < c1["open"] and c2["close"] > c2["open"]): return False
-    engulfs = c2["close"] > c1["open"] and c2["open"] < c1["close"] and \
-              (c2["close"] - c2["open"]) > (c1["open"] - c1["close"]) * 0.9 # Melonggarkan sedikit engulfment
-    if confirm_volume: return engulfs and c2["volume"] > c1["volume"]
-    return engulfs
-
-def is_bearish_engulfing(c1, c2, confirm_volume=False):
-    if not (c1["close"] > c1["open"] and c2["close"] < c2["open"]): return False
-    engulfs = c2["close"] < c1["open"] and c2["open"] > c1["close"] and \
-              (c2["open"] - c2["close"]) > (c1["close"] - c1["open"]) * 0.9 # Melonggarkan sedikit engulfment
-    if confirm_volume: return engulfs and c2["volume"] > c1["volume"]
-    return engulfs
-
-def is_pin_bar(c):
-    props = get_candle_properties(c)
-    if props["full_range"] == 0 or props["body_to_range_ratio"] > 0.4: return False # Dari 0.35 menjadi 0.4
-    return (props["is_bullish"] and props["lower_shadow"] >= 1.8 * props["body_abs"] and props["upper_shadow"] < 0.2 * props["full_range"]) or \
-           (props["is_bearish"] and props["upper_shadow"] >= 1.8 * props["body_abs"] and props["lower_shadow"] < 0.2 * props["full_range"])
-
-def is_doji(c):
-    props = get_candle_properties(c)
-    return props["is_doji_like"] # Disesuaikan oleh is_doji_like di get_candle_properties
-
-def is_hammer(c, trend_context="None"):
-    props = get_candle_properties(c)
-    if props["full_range"] == 0 or props["body_to_range_ratio"] > 0.4: return False # Dari 0.35 menjadi 0.4
-    is_hammer_shape = props["lower_shadow"] >= 1.8 * props["body_abs"] and props["upper_shadow"] < 0.15 * props["full_range"] # Dari 2x menjadi 1.8x, upper shadow dari 0.1 menjadi 0.15
-    return is_hammer_shape if trend_context == "Downtrend" else is_hammer_shape
-
-def is_hanging_man(c, trend_context="None"):
-    props = get_candle_properties(c)
-    if props["full_range"] == 0 or props["body_to_range_ratio"] > 0.4: return False # Dari 0.35 menjadi 0.4
-    is_hanging_man_shape = props["lower_shadow"] >= 1.8 * props["body_abs"] and props["upper_shadow"] < 0.15 * props["full_range"] # Dari 2x menjadi 1.8x, upper shadow dari 0.1 menjadi 0.15
-    return is_hanging_man_shape if trend_context == "Uptrend" else is_hanging_man_shape
-
-def is_inverted_hammer(c, trend_context="None"):
-    props = get_candle_properties(c)
-    if props["full_range"] == 0 or props["body_to_range_ratio"] > 0.4: return False # Dari 0.35 menjadi 0.4
-    is_inverted_hammer_shape = props["upper_shadow"] >= 1.8 * props["body_abs"] and props["lower_shadow"] < 0.15 * props["full_range"] # Dari 2x menjadi 1.8x, lower shadow dari 0.1 menjadi 0.15
-    return is_inverted_hammer_shape if trend_context == "Downtrend" else is_inverted_hammer_shape
-
-def is_shooting_star(c, trend_context="None"):
-    props = get_candle_properties(c)
-    if props["full_range"] == 0 or props["body_to_range_ratio"] > 0.4: return False # Dari 0.35 menjadi 0.4
-    is_shooting_star_shape = props["upper_shadow"] >= 1.8 * props["body_abs"] and props["lower_shadow"] < 0.15 * props["full_range"] # Dari 2x menjadi 1.8x, lower shadow dari 0.1 menjadi 0.15
-    return is_shooting_star_shape if trend_context == "Uptrend" else is_shooting_star_shape
-
-def is_morning_star(c1, c2, c3):
-    props1, props2, props3 = get_candle_properties(c1), get_candle_properties(c2), get_candle_properties(c3)
-    if not (props1["is_bearish"] and props3["is_bullish"] and props1["body_to_range_ratio"] > 0.4 and props3["body_to_range_ratio"] > 0.4): return False # Dari 0.5 menjadi 0.4
-    if not (props2["is_doji_like"] or props2["body_to_range_ratio"] < 0.4): return False # Dari 0.3 menjadi 0.4
-    return c3["close"] > (c1["open"] + c1["close"]) / 2
-
-def is_evening_star(c1, c2, c3):
-    props1, props2, props3 = get_candle_properties(c1), get_candle_properties(c2), get_candle_properties(c3)
-    if not (props1["is_bullish"] and props3["is_bearish"] and props1["body_to_range_ratio"] > 0.4 and props3["body_to_range_ratio"] > 0.4): return False # Dari 0.5 menjadi 0.4
-    if not (props2["is_doji_like"] or props2["body_to_range_ratio"] < 0.4): return False # Dari 0.3 menjadi 0.4
-    return c3["close"] < (c1["open"] + c1["close"]) / 2
-
-def is_inside_bar(c1, c2):
-    # Diperbarui: Memastikan c2 body ada di dalam c1 body (lebih ketat tapi esensi inside bar)
-    return c2["high"] < c1["high"] and c2["low"] > c1["low"]
-
-def is_outside_bar(c1, c2):
-    return c2["high"] > c1["high"] and c2["low"] < c1["low"]
-
-def is_tweezer_top(c1, c2):
-    # Diperbarui: Sedikit melonggarkan toleransi puncak
-    if not (abs(c1["high"] - c2["high"]) / c1["high"] < 0.001): return False # Dari 0.0005 menjadi 0.001
-    return c1["close"] > c1["open"] and c2["close"] < c2["open"]
-
-def is_tweezer_bottom(c1, c2):
-    # Diperbarui: Sedikit melonggarkan toleransi dasar
-    if not (abs(c1["low"] - c2["low"]) / c1["low"] < 0.001): return False # Dari 0.0005 menjadi 0.001
-    return c1["close"] < c1["open"] and c2["close"] > c2["open"]
-
-def is_three_white_soldiers(c1, c2, c3):
-    props1, props2, props3 = get_candle_properties(c1), get_candle_properties(c2), get_candle_properties(c3)
-    if not (props1["is_bullish"] and props2["is_bullish"] and props3["is_bullish"] and \
-            props1["body_to_range_ratio"] > 0.5 and props2["body_to_range_ratio"] > 0.5 and props3["body_to_range_ratio"] > 0.5): return False # Dari 0.6 menjadi 0.5
-    if not (c2["close"] > c1["close"] and c3["close"] > c2["close"]): return False
-    if not (c2["open"] > c1["open"] and c2["open"] < c1["close"] * 1.01): return False # Membolehkan gap up sedikit
-    if not (c3["open"] > c2["open"] and c3["open"] < c2["close"] * 1.01): return False # Membolehkan gap up sedikit
-    return True
-
-def is_three_black_crows(c1, c2, c3):
-    props1, props2, props3 = get_candle_properties(c1), get_candle_properties(c2), get_candle_properties(c3)
-    if not (props1["is_bearish"] and props2["is_bearish"] and props3["is_bearish"] and \
-            props1["body_to_range_ratio"] > 0.5 and props2["body_to_range_ratio"] > 0.5 and props3["body_to_range_ratio"] > 0.5): return False # Dari 0.6 menjadi 0.5
-    if not (c2["close"] < c1["close"] and c3["close"] < c2["close"]): return False
-    if not (c2["open"] < c1["open"] and c2["open"] > c1["close"] * 0.99): return False # Membolehkan gap down sedikit
-    if not (c3["open"] < c2["open"] and c3["open"] > c2["close"] * 0.99): return False # Membolehkan gap down sedikit
-    return True
-
-def is_dark_cloud_cover(c1, c2):
-    if not (c1["close"] > c1["open"] and c2["close"] < c2["open"]): return False
-    if not (c2["open"] > c1["high"]): return False
-    if not (c2["close"] < (c1["open"] + c1["close"]) / 2 and c2["close"] > c1["open"]): return False
-    props2 = get_candle_properties(c2)
-    if props2["body_to_range_ratio"] < 0.5: return False # Memastikan candle bearish cukup kuat
-    return True
-
-def is_piercing_pattern(c1, c2):
-    if not (c1["close"] < c1["open"] and c2["close"] > c2["open"]): return False
-    if not (c2["open"] < c1["low"]): return False
-    if not (c2["close"] > (c1["open"] + c1["close"]) / 2 and c2["close"] < c1["open"]): return False
-    props2 = get_candle_properties(c2)
-    if props2["body_to_range_ratio"] < 0.5: return False # Memastikan candle bullish cukup kuat
-    return True
-
-def is_bullish_harami(c1, c2):
-    props1, props2 = get_candle_properties(c1), get_candle_properties(c2)
-    if not (props1["is_bearish"] and props2["is_bullish"] and props1["body_to_range_ratio"] > 0.5 and props2["body_to_range_ratio"] < 0.5): return False # Dari 0.6 & 0.4 menjadi 0.5 & 0.5
-    return c2["open"] > c1["close"] and c2["close"] < c1["open"]
-
-def is_bearish_harami(c1, c2):
-    props1, props2 = get_candle_properties(c1), get_candle_properties(c2)
-    if not (props1["is_bullish"] and props2["is_bearish"] and props1["body_to_range_ratio"] > 0.5 and props2["body_to_range_ratio"] < 0.5): return False # Dari 0.6 & 0.4 menjadi 0.5 & 0.5
-    return c2["open"] < c1["close"] and c2["close"] > c1["open"]
-
-def detect_price_action(candles: list, enable_volume_confirmation: bool = False) -> list: # Default False
-    patterns = []
-    if len(candles) < 3: return patterns
-    
-    c1, c2, c3 = candles[-3], candles[-2], candles[-1]
-    current_trend = get_trend_direction(candles[:-1])
-
-    # Pola 2 Candle
-    if is_bullish_engulfing(c2, c3, confirm_volume=enable_volume_confirmation): patterns.append("Bullish Engulfing")
-    if is_bearish_engulfing(c2, c3, confirm_volume=enable_volume_confirmation): patterns.append("Bearish Engulfing")
-    if is_inside_bar(c2, c3): patterns.append("Inside Bar")
-    if is_outside_bar(c2, c3): patterns.append("Outside Bar")
-    if is_tweezer_top(c2, c3): patterns.append("Tweezer Top")
-    if is_tweezer_bottom(c2, c3): patterns.append("Tweezer Bottom")
-    if is_dark_cloud_cover(c2, c3): patterns.append("Dark Cloud Cover")
-    if is_piercing_pattern(c2, c3): patterns.append("Piercing Pattern")
-    if is_bullish_harami(c2, c3): patterns.append("Bullish Harami")
-    if is_bearish_harami(c2, c3): patterns.append("Bearish Harami")
-
-    # Pola 1 Candle
-    if is_pin_bar(c3): patterns.append("Pin Bar")
-    if is_doji(c3): patterns.append("Doji")
+# Bit flag per pola candlestick; urutan bit = urutan pola pada output detect_price_action
+FLAG_BULLISH_ENGULFING = 1 << 0
+FLAG_BEARISH_ENGULFING = 1 << 1
+FLAG_INSIDE_BAR = 1 << 2
+FLAG_OUTSIDE_BAR = 1 << 3
+FLAG_TWEEZER_TOP = 1 << 4
+FLAG_TWEEZER_BOTTOM = 1 << 5
+FLAG_DARK_CLOUD_COVER = 1 << 6
+FLAG_PIERCING_PATTERN = 1 << 7
+FLAG_BULLISH_HARAMI = 1 << 8
+FLAG_BEARISH_HARAMI = 1 << 9
+FLAG_PIN_BAR = 1 << 10
+FLAG_DOJI = 1 << 11
+FLAG_HAMMER = 1 << 12
+FLAG_HANGING_MAN = 1 << 13
+FLAG_INVERTED_HAMMER = 1 << 14
+FLAG_SHOOTING_STAR = 1 << 15
+FLAG_MORNING_STAR = 1 << 16
+FLAG_EVENING_STAR = 1 << 17
+FLAG_THREE_WHITE_SOLDIERS = 1 << 18
+FLAG_THREE_BLACK_CROWS = 1 << 19
+
+_PATTERN_NAMES = (
+    (FLAG_BULLISH_ENGULFING, "Bullish Engulfing"),
+    (FLAG_BEARISH_ENGULFING, "Bearish Engulfing"),
+    (FLAG_INSIDE_BAR, "Inside Bar"),
+    (FLAG_OUTSIDE_BAR, "Outside Bar"),
+    (FLAG_TWEEZER_TOP, "Tweezer Top"),
+    (FLAG_TWEEZER_BOTTOM, "Tweezer Bottom"),
+    (FLAG_DARK_CLOUD_COVER, "Dark Cloud Cover"),
+    (FLAG_PIERCING_PATTERN, "Piercing Pattern"),
+    (FLAG_BULLISH_HARAMI, "Bullish Harami"),
+    (FLAG_BEARISH_HARAMI, "Bearish Harami"),
+    (FLAG_PIN_BAR, "Pin Bar"),
+    (FLAG_DOJI, "Doji"),
     # Konteks trend sangat penting untuk Hammer/Shooting Star
-    if is_hammer(c3, trend_context=current_trend): patterns.append(f"Hammer (in {current_trend} context)")
-    if is_hanging_man(c3, trend_context=current_trend): patterns.append(f"Hanging Man (in {current_trend} context)")
-    if is_inverted_hammer(c3, trend_context=current_trend): patterns.append(f"Inverted Hammer (in {current_trend} context)")
-    if is_shooting_star(c3, trend_context=current_trend): patterns.append(f"Shooting Star (in {current_trend} context)")
-
-    # Pola 3 Candle
-    if len(candles) >= 3:
-        if is_morning_star(c1, c2, c3): patterns.append("Morning Star")
-        if is_evening_star(c1, c2, c3): patterns.append("Evening Star")
-        if is_three_white_soldiers(c1, c2, c3): patterns.append("Three White Soldiers")
-        if is_three_black_crows(c1, c2, c3): patterns.append("Three Black Crows")
+    (FLAG_HAMMER, "Hammer (in {trend} context)"),
+    (FLAG_HANGING_MAN, "Hanging Man (in {trend} context)"),
+    (FLAG_INVERTED_HAMMER, "Inverted Hammer (in {trend} context)"),
+    (FLAG_SHOOTING_STAR, "Shooting Star (in {trend} context)"),
+    (FLAG_MORNING_STAR, "Morning Star"),
+    (FLAG_EVENING_STAR, "Evening Star"),
+    (FLAG_THREE_WHITE_SOLDIERS, "Three White Soldiers"),
+    (FLAG_THREE_BLACK_CROWS, "Three Black Crows"),
+)
+
+# Pola yang hanya bermakna pada konteks trend tertentu (bentuk candle sama, arti tergantung trend)
+_CONTEXT_FLAGS = FLAG_HAMMER | FLAG_HANGING_MAN | FLAG_INVERTED_HAMMER | FLAG_SHOOTING_STAR
+_TREND_CONTEXT_FLAGS = {
+    "Downtrend": FLAG_HAMMER | FLAG_INVERTED_HAMMER, # Sinyal pembalikan naik
+    "Uptrend": FLAG_HANGING_MAN | FLAG_SHOOTING_STAR # Sinyal pembalikan turun
+}
+# Tabel decode per trend: nama pola konteks sudah diformat sekali, dan pola konteks yang
+# tidak sesuai trend (mis. Hammer saat Uptrend) tidak dimasukkan ke tabel
+_PATTERN_TABLES = {
+    trend: tuple((flag, name.format(trend=trend)) for flag, name in _PATTERN_NAMES
+                 if not flag & _CONTEXT_FLAGS or flag & _TREND_CONTEXT_FLAGS.get(trend, 0))
+    for trend in ("Uptrend", "Downtrend", "Sideways", "Unknown")
+}
 
-    return patterns
+@njit(cache=True, fastmath=True, nogil=True)
+def scan_patterns(open_, high, low, close, volume, out_flags, confirm_volume=False):
+    """
+    Mendeteksi semua pola candlestick untuk setiap bar dalam satu loop dan menulis bitmask
+    FLAG_* ke out_flags[i]. Suffix 1/2/3 mengikuti konvensi c1, c2, c3: candle i-2, i-1, dan i.
+    Properti candle sebelumnya dibawa antar iterasi sehingga tiap bar hanya dihitung sekali.
+    Rasio body/range dibandingkan lewat perkalian (body < k * range), bukan pembagian,
+    agar loop bebas divisi dan dapat divektorisasi oleh LLVM.
+    """
+    n = close.shape[0]
+    o1 = c1 = body1 = rng1 = 0.0
+    bull1 = bear1 = False
+    o2 = h2 = l2 = c2 = v2 = body2 = rng2 = 0.0
+    bull2 = bear2 = doji2 = False
+    for i in range(n):
+        o3, h3, l3, c3, v3 = open_[i], high[i], low[i], close[i], volume[i]
+        body3 = abs(c3 - o3)
+        rng3 = h3 - l3
+        upper3 = h3 - max(o3, c3)
+        lower3 = min(o3, c3) - l3
+        bull3 = c3 > o3
+        bear3 = c3 < o3
+        doji3 = rng3 == 0 or body3 < 0.15 * rng3 # Diperbarui: sedikit melonggarkan kriteria doji (dari 0.1 menjadi 0.15)
+        flags = 0
+
+        # Pola 1 Candle
+        # Diperbarui: Melonggarkan beberapa rasio body/shadow untuk deteksi lebih luas
+        if rng3 != 0 and body3 <= 0.4 * rng3: # Dari 0.35 menjadi 0.4
+            if (bull3 and lower3 >= 1.8 * body3 and upper3 < 0.2 * rng3) or \
+               (bear3 and upper3 >= 1.8 * body3 and lower3 < 0.2 * rng3):
+                flags |= FLAG_PIN_BAR
+            # Hammer/Hanging Man (dan Inverted Hammer/Shooting Star) berbagi bentuk yang sama; konteks tren ditambahkan saat decode
+            if lower3 >= 1.8 * body3 and upper3 < 0.15 * rng3: # Dari 2x menjadi 1.8x, upper shadow dari 0.1 menjadi 0.15
+                flags |= FLAG_HAMMER | FLAG_HANGING_MAN
+            if upper3 >= 1.8 * body3 and lower3 < 0.15 * rng3: # Dari 2x menjadi 1.8x, lower shadow dari 0.1 menjadi 0.15
+                flags |= FLAG_INVERTED_HAMMER | FLAG_SHOOTING_STAR
+        if doji3:
+            flags |= FLAG_DOJI
+
+        # Pola 2 Candle
+        if i >= 1:
+            if bear2 and bull3 and c3 > o2 and o3 < c2 and (c3 - o3) > (o2 - c2) * 0.9: # Melonggarkan sedikit engulfment
+                if not confirm_volume or v3 > v2:
+                    flags |= FLAG_BULLISH_ENGULFING
+            if bull2 and bear3 and c3 < o2 and o3 > c2 and (o3 - c3) > (c2 - o2) * 0.9: # Melonggarkan sedikit engulfment
+                if not confirm_volume or v3 > v2:
+                    flags |= FLAG_BEARISH_ENGULFING
+            if h3 < h2 and l3 > l2:
+                flags |= FLAG_INSIDE_BAR
+            if h3 > h2 and l3 < l2:
+                flags |= FLAG_OUTSIDE_BAR
+            if abs(h2 - h3) < 0.001 * h2 and bull2 and bear3: # Toleransi puncak dari 0.0005 menjadi 0.001
+                flags |= FLAG_TWEEZER_TOP
+            if abs(l2 - l3) < 0.001 * l2 and bear2 and bull3: # Toleransi dasar dari 0.0005 menjadi 0.001
+                flags |= FLAG_TWEEZER_BOTTOM
+            if bull2 and bear3 and o3 > h2 and c3 < (o2 + c2) * 0.5 and c3 > o2 and body3 >= 0.5 * rng3: # Candle bearish cukup kuat
+                flags |= FLAG_DARK_CLOUD_COVER
+            if bear2 and bull3 and o3 < l2 and c3 > (o2 + c2) * 0.5 and c3 < o2 and body3 >= 0.5 * rng3: # Candle bullish cukup kuat
+                flags |= FLAG_PIERCING_PATTERN
+            if bear2 and bull3 and body2 > 0.5 * rng2 and body3 < 0.5 * rng3 and o3 > c2 and c3 < o2: # Dari 0.6 & 0.4 menjadi 0.5 & 0.5
+                flags |= FLAG_BULLISH_HARAMI
+            if bull2 and bear3 and body2 > 0.5 * rng2 and body3 < 0.5 * rng3 and o3 < c2 and c3 > o2: # Dari 0.6 & 0.4 menjadi 0.5 & 0.5
+                flags |= FLAG_BEARISH_HARAMI
+
+        # Pola 3 Candle
+        if i >= 2:
+            if body1 > 0.4 * rng1 and body3 > 0.4 * rng3 and (doji2 or body2 < 0.4 * rng2): # Dari 0.5 menjadi 0.4, candle tengah dari 0.3 menjadi 0.4
+                if bear1 and bull3 and c3 > (o1 + c1) * 0.5:
+                    flags |= FLAG_MORNING_STAR
+                if bull1 and bear3 and c3 < (o1 + c1) * 0.5:
+                    flags |= FLAG_EVENING_STAR
+            if body1 > 0.5 * rng1 and body2 > 0.5 * rng2 and body3 > 0.5 * rng3: # Dari 0.6 menjadi 0.5
+                # Membolehkan gap up/down sedikit
+                if bull1 and bull2 and bull3 and c2 > c1 and c3 > c2 and \
+                   o2 > o1 and o2 < c1 * 1.01 and o3 > o2 and o3 < c2 * 1.01:
+                    flags |= FLAG_THREE_WHITE_SOLDIERS
+                if bear1 and bear2 and bear3 and c2 < c1 and c3 < c2 and \
+                   o2 < o1 and o2 > c1 * 0.99 and o3 < o2 and o3 > c2 * 0.99:
+                    flags |= FLAG_THREE_BLACK_CROWS
+
+        out_flags[i] = flags
+        o1, c1, body1, rng1, bull1, bear1 = o2, c2, body2, rng2, bull2, bear2
+        o2, h2, l2, c2, v2, body2, rng2, bull2, bear2, doji2 = o3, h3, l3, c3, v3, body3, rng3, bull3, bear3, doji3
+
+def detect_price_action(candles: CandleBuffer, enable_volume_confirmation: bool = False) -> list: # Default False
+    if len(candles) < 3: return []
+    
+    current_trend = get_trend_direction(candles, end=-1)
+
+    # Hanya 3 candle terakhir yang dibutuhkan untuk pola di candle terakhir
+    flags = np.zeros(3, dtype=np.uint32)
+    scan_patterns(candles.open[-3:], candles.high[-3:], candles.low[-3:], candles.close[-3:], candles.volume[-3:],
+                  flags, enable_volume_confirmation)
+    last_flags = int(flags[-1])
+    # Hammer/Inverted Hammer hanya di Downtrend, Hanging Man/Shooting Star hanya di Uptrend (sudah tercermin di tabel)
+    return [name for flag, name in _PATTERN_TABLES[current_trend] if last_flags & flag]
 
 # --- CHART PATTERN DETECTION ---
-def get_significant_swing_points(candles: list, window: int = 30, threshold: float = 0.0075) -> tuple: # Window 30, Threshold 0.0075 (dari 20, 0.01/0.015)
-    swing_highs = []
-    swing_lows = []
-    if len(candles) < window * 2 + 1: return [], []
-
-    for i in range(window, len(candles) - window):
-        current_high = candles[i]["high"]
-        current_low = candles[i]["low"]
-        is_swing_high = True
-        for j in range(i - window, i + window + 1):
-            if j != i and candles[j]["high"] > current_high: is_swing_high = False; break
-        # Diperbarui: Melonggarkan kondisi konfirmasi swing point (harga berikutnya harus jatuh setelah puncak)
-        if is_swing_high and (candles[i+window]["low"] < current_high * (1 - threshold)): # Memastikan ada penurunan setelah puncak
-            swing_highs.append((i, current_high))
+# Setting swing point (window, threshold) per detektor
+CHART_PATTERN_SWING = (20, 0.01) # Sensitivitas lebih tinggi dari default
+BOS_CHOCH_SWING = (10, 0.002) # Window lebih kecil, threshold lebih sensitif
+AUTO_SR_SWING = (15, 0.003) # Window lebih kecil, threshold lebih sensitif
+SWING_SETTINGS = (CHART_PATTERN_SWING, BOS_CHOCH_SWING, AUTO_SR_SWING)
+
+@njit(cache=True, nogil=True)
+def rolling_argmax(values, window, start, stop):
+    """
+    Mengembalikan indeks i (start <= i < stop) di mana values[i] adalah maksimum dalam jendela
+    [i - window, i + window]. Memakai deque monoton (buffer indeks double-ended), O(N) untuk seluruh sweep.
+    """
+    if stop <= start:
+        return np.empty(0, dtype=np.int64)
+    out = np.empty(stop - start, dtype=np.int64)
+    count = 0
+    dq = np.empty(stop - start + 2 * window, dtype=np.int64)
+    head = tail = 0
+    for j in range(start - window, stop + window):
+        while tail > head and values[dq[tail - 1]] <= values[j]:
+            tail -= 1
+        dq[tail] = j
+        tail += 1
+        i = j - window # Jendela untuk kandidat i sudah lengkap
+        if i >= start:
+            while dq[head] < i - window:
+                head += 1
+            if values[dq[head]] <= values[i]: # Tidak ada nilai lain yang lebih tinggi
+                out[count] = i
+                count += 1
+    return out[:count]
+
+def _local_max_indices(values: np.ndarray, window: int, start: int, stop: int) -> np.ndarray:
+    """
+    Indeks i (start <= i < stop) di mana values[i] adalah maksimum jendela [i - window, i + window].
+    Dengan Numba memakai deque O(N) (rolling_argmax); tanpa Numba memakai rolling max NumPy
+    lewat sliding_window_view agar tidak jatuh ke loop Python.
+    """
+    if NUMBA_AVAILABLE or stop <= start:
+        return rolling_argmax(values, window, start, stop)
+    rolling_max = sliding_window_view(values[start - window:stop + window], 2 * window + 1).max(axis=1)
+    return np.flatnonzero(values[start:stop] >= rolling_max) + start
 
-        is_swing_low = True
-        for j in range(i - window, i + window + 1):
-            if j != i and candles[j]["low"] < current_low: is_swing_low = False; break
+def _find_swing_points(highs: np.ndarray, lows: np.ndarray, starts: dict) -> dict:
+    """
+    Mencari swing point untuk beberapa setting (window, threshold) sekaligus; `starts` memetakan setting ke
+    indeks kandidat pertama yang perlu dihitung. Ekstrem lokal dicari sekali dengan window terkecil:
+    ekstrem untuk window yang lebih besar selalu merupakan subsetnya, sehingga cukup difilter ulang.
+    """
+    n = len(highs)
+    base_window = min(window for window, _ in starts)
+    base_start = max(min(starts.values()), base_window)
+    high_candidates = _local_max_indices(highs, base_window, base_start, n - base_window)
+    low_candidates = _local_max_indices(-lows, base_window, base_start, n - base_window) # Minimum lokal = maksimum lokal dari -low
+
+    result = {}
+    for (window, threshold), start in starts.items():
+        high_idx = high_candidates[(high_candidates >= start) & (high_candidates < n - window)]
+        low_idx = low_candidates[(low_candidates >= start) & (low_candidates < n - window)]
+        if window > base_window: # Jendela kandidat i = baris (i - window) dari sliding window view
+            high_idx = high_idx[sliding_window_view(highs, 2 * window + 1)[high_idx - window].max(axis=1) <= highs[high_idx]]
+            low_idx = low_idx[sliding_window_view(lows, 2 * window + 1)[low_idx - window].min(axis=1) >= lows[low_idx]]
+        # Diperbarui: Melonggarkan kondisi konfirmasi swing point (harga berikutnya harus jatuh setelah puncak)
+        high_idx = high_idx[lows[high_idx + window] < highs[high_idx] * (1 - threshold)] # Memastikan ada penurunan setelah puncak
         # Diperbarui: Melonggarkan kondisi konfirmasi swing point (harga berikutnya harus naik setelah lembah)
-        if is_swing_low and (candles[i+window]["high"] > current_low * (1 + threshold)): # Memastikan ada kenaikan setelah lembah
-            swing_lows.append((i, current_low))
-            
-    return swing_highs, swing_lows
+        low_idx = low_idx[highs[low_idx + window] > lows[low_idx] * (1 + threshold)] # Memastikan ada kenaikan setelah lembah
+        result[(window, threshold)] = (list(zip(high_idx.tolist(), highs[high_idx].tolist())),
+                                       list(zip(low_idx.tolist(), lows[low_idx].tolist())))
+    return result
+
+def get_significant_swing_points(candles: CandleBuffer, window: int = 30, threshold: float = 0.0075) -> tuple: # Window 30, Threshold 0.0075 (dari 20, 0.01/0.015)
+    """Swing high/low signifikan; dibaca dari cache CandleBuffer dan hanya diperpanjang untuk candle baru."""
+    return candles.swing_points(window, threshold)
+
+def get_all_swing_points(candles: CandleBuffer, settings: tuple = None) -> dict:
+    """
+    Menghitung swing point untuk semua setting detektor dalam satu sweep.
+    Hasil {(window, threshold): (swing_highs, swing_lows)} diteruskan ke detektor lewat argumen `swings`.
+    """
+    return candles.swing_points_multi(settings or SWING_SETTINGS)
 
-def detect_double_top_bottom(candles: list) -> list:
+def _swing_prices_between(swings: list, start_idx: int, end_idx: int) -> list:
+    """Harga swing dengan start_idx < indeks < end_idx; list swing terurut indeks sehingga cukup dua bisect."""
+    lo = bisect.bisect_right(swings, (start_idx, math.inf))
+    hi = bisect.bisect_left(swings, (end_idx, -math.inf), lo)
+    return [price for _, price in swings[lo:hi]]
+
+def detect_double_top_bottom(candles: CandleBuffer, swings: dict = None) -> list:
     patterns = []
     # Diperbarui: Membutuhkan lebih sedikit candle untuk deteksi awal
     if len(candles) < 70: return patterns # Dari 100 menjadi 70
     
     # Diperbarui: Menggunakan window dan threshold yang lebih sensitif
-    swing_highs, swing_lows = get_significant_swing_points(candles, window=20, threshold=0.01) # Sensitivitas lebih tinggi dari default
+    swing_highs, swing_lows = swings[CHART_PATTERN_SWING] if swings else get_significant_swing_points(candles, *CHART_PATTERN_SWING)
 
     if len(swing_highs) >= 2:
         h2_idx, h2_price = swing_highs[-1]
         h1_idx, h1_price = swing_highs[-2]
         # Diperbarui: Melonggarkan jarak antar puncak dan toleransi harga
         if h2_idx > h1_idx + 5 and abs(h1_price - h2_price) / h1_price < 0.015: # Dari 10 menjadi 5, dari 0.01 menjadi 0.015 (1.5%)
-            valley_lows = [sl_price for sl_idx, sl_price in swing_lows if h1_idx < sl_idx < h2_idx]
-            if valley_lows and candles[-1]["close"] < max(valley_lows) * 0.99: # Memastikan penembusan neckline (1%)
+            valley_lows = _swing_prices_between(swing_lows, h1_idx, h2_idx)
+            if valley_lows and candles.close[-1] < max(valley_lows) * 0.99: # Memastikan penembusan neckline (1%)
                 patterns.append("Double Top")
 
     if len(swing_lows) >= 2:
@@ -359,18 +730,18 @@ def detect_double_top_bottom(candles: list) -> list:
         l1_idx, l1_price = swing_lows[-2]
         # Diperbarui: Melonggarkan jarak antar lembah dan toleransi harga
         if l2_idx > l1_idx + 5 and abs(l1_price - l2_price) / l1_price < 0.015: # Dari 10 menjadi 5, dari 0.01 menjadi 0.015 (1.5%)
-            peak_highs = [sh_price for sh_idx, sh_price in swing_highs if l1_idx < sh_idx < l2_idx]
-            if peak_highs and candles[-1]["close"] > min(peak_highs) * 1.01: # Memastikan penembusan neckline (1%)
+            peak_highs = _swing_prices_between(swing_highs, l1_idx, l2_idx)
+            if peak_highs and candles.close[-1] > min(peak_highs) * 1.01: # Memastikan penembusan neckline (1%)
                 patterns.append("Double Bottom")
     return patterns
 
-def detect_head_and_shoulders(candles: list) -> list:
+def detect_head_and_shoulders(candles: CandleBuffer, swings: dict = None) -> list:
     patterns = []
     # Diperbarui: Membutuhkan lebih sedikit candle untuk deteksi awal
     if len(candles) < 100: return patterns # Dari 150 menjadi 100
     
     # Diperbarui: Menggunakan window dan threshold yang lebih sensitif
-    swing_highs, swing_lows = get_significant_swing_points(candles, window=20, threshold=0.01) # Sensitivitas lebih tinggi dari default
+    swing_highs, swing_lows = swings[CHART_PATTERN_SWING] if swings else get_significant_swing_points(candles, *CHART_PATTERN_SWING)
 
     # Head & Shoulders
     if len(swing_highs) >= 3 and len(swing_lows) >= 2:
@@ -380,12 +751,12 @@ def detect_head_and_shoulders(candles: list) -> list:
         # Diperbarui: Memastikan urutan index dan melonggarkan toleransi shoulder
         if s1_idx < h_idx < s3_idx and h_price > s1_price * 1.01 and h_price > s3_price * 1.01 and \
            abs(s1_price - s3_price) / s1_price < 0.03: # Shoulder within 3% (dari 2%)
-            valley1_price = max([sl_price for sl_idx, sl_price in swing_lows if s1_idx < sl_idx < h_idx] or [0])
-            valley2_price = max([sl_price for sl_idx, sl_price in swing_lows if h_idx < sl_idx < s3_idx] or [0])
+            valley1_price = max(_swing_prices_between(swing_lows, s1_idx, h_idx) or [0])
+            valley2_price = max(_swing_prices_between(swing_lows, h_idx, s3_idx) or [0])
             if valley1_price > 0 and valley2_price > 0:
                 neckline_level = (valley1_price + valley2_price) / 2
                 # Diperbarui: Memastikan penembusan neckline yang lebih jelas
-                if candles[-1]["close"] < neckline_level * 0.995: # Broke decisively (0.5%)
+                if candles.close[-1] < neckline_level * 0.995: # Broke decisively (0.5%)
                     patterns.append("Head & Shoulders")
 
     # Inverse Head & Shoulders
@@ -396,31 +767,31 @@ def detect_head_and_shoulders(candles: list) -> list:
         # Diperbarui: Memastikan urutan index dan melonggarkan toleransi shoulder
         if l1_idx < h_idx < l3_idx and h_price < l1_price * 0.99 and h_price < l3_price * 0.99 and \
            abs(l1_price - l3_price) / l1_price < 0.03: # Shoulder within 3% (dari 2%)
-            peak1_price = min([sh_price for sh_idx, sh_price in swing_highs if l1_idx < sh_idx < h_idx] or [float('inf')])
-            peak2_price = min([sh_price for sh_idx, sh_price in swing_highs if h_idx < sh_idx < l3_idx] or [float('inf')])
+            peak1_price = min(_swing_prices_between(swing_highs, l1_idx, h_idx) or [float('inf')])
+            peak2_price = min(_swing_prices_between(swing_highs, h_idx, l3_idx) or [float('inf')])
             if peak1_price != float('inf') and peak2_price != float('inf'):
                 neckline_level = (peak1_price + peak2_price) / 2
                 # Diperbarui: Memastikan penembusan neckline yang lebih jelas
-                if candles[-1]["close"] > neckline_level * 1.005: # Broke decisively (0.5%)
+                if candles.close[-1] > neckline_level * 1.005: # Broke decisively (0.5%)
                     patterns.append("Inverse Head & Shoulders")
     return patterns
 
-def detect_chart_patterns(candles: list) -> list:
+def detect_chart_patterns(candles: CandleBuffer, swings: dict = None) -> list:
     """Menggabungkan semua deteksi pola chart."""
     result = []
-    result.extend(detect_double_top_bottom(candles))
-    result.extend(detect_head_and_shoulders(candles))
+    result.extend(detect_double_top_bottom(candles, swings))
+    result.extend(detect_head_and_shoulders(candles, swings))
     # Placeholder for more complex pattern detections that require robust trend line detection
     return result
 
 # --- SMART MONEY CONCEPTS (SMC - Dasar) ---
-def detect_bos_choch(candles: list) -> list:
+def detect_bos_choch(candles: CandleBuffer, swings: dict = None) -> list:
     patterns = []
     # Diperbarui: Membutuhkan lebih sedikit candle untuk deteksi awal
     if len(candles) < 30: return patterns # Dari 50 menjadi 30
     
     # Diperbarui: Menggunakan window dan threshold yang lebih sensitif
-    swing_highs, swing_lows = get_significant_swing_points(candles, window=10, threshold=0.002) # Window lebih kecil, threshold lebih sensitif
+    swing_highs, swing_lows = swings[BOS_CHOCH_SWING] if swings else get_significant_swing_points(candles, *BOS_CHOCH_SWING)
 
     if len(swing_highs) < 2 or len(swing_lows) < 2: return patterns
 
@@ -430,7 +801,7 @@ def detect_bos_choch(candles: list) -> list:
     last_low_idx, last_low_price = swing_lows[-1]
     prev_low_idx, prev_low_price = swing_lows[-2]
 
-    current_close = candles[-1]["close"]
+    current_close = candles.close[-1]
     # Perubahan untuk BOS/CHoCH, periksa penutupan di atas/bawah swing point sebelumnya
     # BOS (Break of Structure)
     if last_high_idx > prev_high_idx and last_low_idx > prev_low_idx: # Uptrend structure (HH, HL)
@@ -454,59 +825,89 @@ def detect_bos_choch(candles: list) -> list:
 
     return patterns
 
-def detect_auto_sr(candles: list, price_tolerance_percent: float = 0.001) -> dict: # Dari 0.002 menjadi 0.001 (lebih ketat untuk clustering)
+@njit(cache=True, nogil=True)
+def cluster_bounds(prices, tolerance):
+    """
+    Clustering satu arah atas harga terurut dalam satu pass: cluster baru dimulai saat harga menjauh
+    dari harga pertama (anchor) cluster lebih dari toleransi. Mengembalikan indeks awal tiap cluster.
+    """
+    n = len(prices)
+    bounds = np.empty(n, dtype=np.int64)
+    k = 0
+    start = 0
+    while start < n:
+        bounds[k] = start
+        k += 1
+        anchor = prices[start]
+        start += 1
+        while start < n and (prices[start] - anchor) / anchor < tolerance:
+            start += 1
+    return bounds[:k]
+
+def _cluster_price_levels(prices: np.ndarray, tolerance: float) -> tuple:
+    """
+    Level S/R (rata-rata cluster) dan jumlah sentuhannya dari harga swing terurut.
+    Dengan Numba batas cluster dicari kernel satu pass (cluster_bounds); tanpa Numba dengan
+    searchsorted per cluster agar tidak jatuh ke loop Python per harga.
+    """
+    if NUMBA_AVAILABLE:
+        bounds = cluster_bounds(prices, tolerance)
+    else:
+        bounds = [0]
+        while bounds[-1] < len(prices):
+            start = bounds[-1]
+            anchor = prices[start]
+            bounds.append(start + 1 + int(np.searchsorted((prices[start + 1:] - anchor) / anchor, tolerance)))
+        bounds = np.array(bounds[:-1])
+    counts = np.diff(np.append(bounds, len(prices)))
+    return np.add.reduceat(prices, bounds) / counts, counts # Use average price for the level
+
+def detect_auto_sr(candles: CandleBuffer, price_tolerance_percent: float = 0.001, swings: dict = None) -> dict: # Dari 0.002 menjadi 0.001 (lebih ketat untuk clustering)
     sr_levels = {"support": [], "resistance": []}
     # Diperbarui: Membutuhkan lebih sedikit candle untuk deteksi awal
     if len(candles) < 50: return sr_levels # Dari 100 menjadi 50
 
     # Diperbarui: Menggunakan window dan threshold yang lebih sensitif
-    swing_highs, swing_lows = get_significant_swing_points(candles, window=15, threshold=0.003) # Window lebih kecil, threshold lebih sensitif
-
-    all_swing_prices = [price for _, price in swing_highs + swing_lows]
-    if not all_swing_prices: return sr_levels
-
-    clustered_levels = {}
-    for price in sorted(all_swing_prices):
-        found_cluster = False
-        for level_key in clustered_levels:
-            if abs(price - level_key) / level_key < price_tolerance_percent:
-                clustered_levels[level_key].append(price)
-                found_cluster = True
-                break
-        if not found_cluster:
-            clustered_levels[price] = [price]
+    swing_highs, swing_lows = swings[AUTO_SR_SWING] if swings else get_significant_swing_points(candles, *AUTO_SR_SWING)
 
-    final_sr_levels = []
+    if not swing_highs and not swing_lows: return sr_levels
+    prices = np.sort(np.array([price for _, price in swing_highs + swing_lows], dtype=np.float64))
+
+    levels, counts = _cluster_price_levels(prices, price_tolerance_percent)
     # Diperbarui: Hanya mempertimbangkan level dengan setidaknya 2 sentuhan
-    for level_key, prices in clustered_levels.items():
-        if len(prices) >= 2: # Dari 3 menjadi 2
-            final_sr_levels.append(sum(prices) / len(prices)) # Use average price for the level
-    
-    final_sr_levels.sort()
+    levels = levels[counts >= 2] # Dari 3 menjadi 2
 
-    current_price = candles[-1]["close"]
-    for level in final_sr_levels:
-        if level < current_price:
-            sr_levels["support"].append(round(level, 2))
-        else:
-            sr_levels["resistance"].append(round(level, 2))
-    
-    sr_levels["support"].sort(reverse=True) # Highest support first
-    sr_levels["resistance"].sort() # Lowest resistance first
+    split = int(np.searchsorted(levels, candles.close[-1])) # Level di bawah harga = support
+    sr_levels["support"] = [round(level, 2) for level in levels[:split][::-1].tolist()] # Highest support first
+    sr_levels["resistance"] = [round(level, 2) for level in levels[split:].tolist()] # Lowest resistance first
 
     return sr_levels
 
+# Klasifikasi arah pola untuk konfirmasi multi-TF (nama persis, bukan pencocokan substring)
+BULLISH_PA_MASK = FLAG_BULLISH_ENGULFING | FLAG_BULLISH_HARAMI | FLAG_HAMMER | FLAG_INVERTED_HAMMER | FLAG_MORNING_STAR
+BEARISH_PA_MASK = FLAG_BEARISH_ENGULFING | FLAG_BEARISH_HARAMI | FLAG_SHOOTING_STAR | FLAG_EVENING_STAR
+BULLISH_PATTERNS = frozenset(
+    {name for table in _PATTERN_TABLES.values() for flag, name in table if flag & BULLISH_PA_MASK} |
+    {"Double Bottom", "Inverse Head & Shoulders", "Bullish BOS (New HH)", "Bullish CHoCH (Downtrend Reversal)"}
+)
+BEARISH_PATTERNS = frozenset(
+    {name for table in _PATTERN_TABLES.values() for flag, name in table if flag & BEARISH_PA_MASK} |
+    {"Double Top", "Head & Shoulders", "Bearish BOS (New LL)", "Bearish CHoCH (Uptrend Reversal)"}
+)
+
 def get_multi_tf_confirmations(current_tf_patterns: list, all_tf_data: dict, current_tf_name: str) -> list:
     confirmations = []
     current_trend_main = get_trend_direction(all_tf_data[current_tf_name])
 
-    tf_order = {"1h": 1, "4h": 2, "1d": 3}
+    current_tf_seconds = _INTERVAL_SECONDS.get(current_tf_name, 0) # Urutan TF = durasinya (tabel konstanta modul)
+    is_bullish_pattern = not BULLISH_PATTERNS.isdisjoint(current_tf_patterns)
+    is_bearish_pattern = not BEARISH_PATTERNS.isdisjoint(current_tf_patterns)
     
     for tf_name, tf_candles_list in all_tf_data.items():
         if tf_name == current_tf_name or not tf_candles_list or len(tf_candles_list) < 5: continue
         
         # Diperbarui: Selaraskan pemeriksaan tren dengan TF yang sama atau lebih tinggi
-        if tf_order.get(tf_name, 0) >= tf_order.get(current_tf_name, 0): # Juga periksa TF yang sama
+        if _INTERVAL_SECONDS.get(tf_name, 0) >= current_tf_seconds: # Juga periksa TF yang sama
             higher_tf_trend = get_trend_direction(tf_candles_list)
             
             if higher_tf_trend == "Uptrend" and current_trend_main == "Uptrend":
@@ -514,9 +915,6 @@ def get_multi_tf_confirmations(current_tf_patterns: list, all_tf_data: dict, cur
             elif higher_tf_trend == "Downtrend" and current_trend_main == "Downtrend":
                 confirmations.append(f"Tren turun selaras di {tf_name.upper()}")
             
-            is_bullish_pattern = any(p for p in current_tf_patterns if "Bullish" in p or "Hammer" in p or "Morning Star" in p or "Double Bottom" in p or "Inverse Head & Shoulders" in p)
-            is_bearish_pattern = any(p for p in current_tf_patterns if "Bearish" in p or "Shooting Star" in p or "Evening Star" in p or "Double Top" in p or "Head & Shoulders" in p)
-
             if is_bullish_pattern and higher_tf_trend == "Uptrend":
                 confirmations.append(f"Pola bullish di {current_tf_name.upper()} didukung tren Uptrend di {tf_name.upper()}")
             elif is_bearish_pattern and higher_tf_trend == "Downtrend":
@@ -524,18 +922,23 @@ def get_multi_tf_confirmations(current_tf_patterns: list, all_tf_data: dict, cur
             
     return confirmations
 
-def get_live_candle_potential_and_process(candle: dict, time_progress: float, average_volume_prev_candles: float) -> str:
-    """Menganalisis potensi awal dan proses perkembangan live candle dengan detail, termasuk volume."""
-    if candle["is_final_bar"]:
+def get_live_candle_potential_and_process(candle: Candle, time_progress: float, average_volume_prev_candles: float,
+                                          props: dict = None) -> str:
+    """
+    Menganalisis potensi awal dan proses perkembangan live candle dengan detail, termasuk volume.
+    `props` (properti candle ini, mis. dari CandleBuffer.props_at(-1)) dipakai ulang jika diberikan.
+    """
+    if candle.is_final_bar:
         return "" # Hanya berlaku untuk live candle
 
-    open_price = candle["open"]
-    current_price = candle["close"]
-    high_price = candle["high"]
-    low_price = candle["low"]
-    current_volume = candle["volume"]
+    open_price = candle.open
+    current_price = candle.close
+    high_price = candle.high
+    low_price = candle.low
+    current_volume = candle.volume
 
-    props = get_candle_properties(candle)
+    if props is None:
+        props = _props(candle)
 
     potential_info = []
     process_info = []
@@ -608,72 +1011,182 @@ def get_live_candle_potential_and_process(candle: dict, time_progress: float, av
 
     return "\n".join(final_message_parts)
 
-def get_average_volume(candles: list, lookback_period: int = 20) -> float:
+def get_average_volume(candles: CandleBuffer, lookback_period: int = 20) -> float:
     """Menghitung rata-rata volume dari beberapa candle terakhir."""
     if len(candles) < lookback_period:
         return 0.0
-    recent_volumes = [c["volume"] for c in candles[-lookback_period-1:-1]] # Ambil volume dari candle sebelumnya (tidak termasuk yang terakhir/live)
-    if not recent_volumes: return 0.0
-    return sum(recent_volumes) / len(recent_volumes)
+    recent_volumes = candles.volume[-lookback_period-1:-1] # Ambil volume dari candle sebelumnya (tidak termasuk yang terakhir/live)
+    if not len(recent_volumes): return 0.0
+    return float(recent_volumes.mean())
 
 # --- MAIN LOGIC FOR PERIODIC SCAN ---
-def scan_all_intervals_and_notify(triggered_by_websocket_tf: str = None):
+# Label statis bagian pesan per TF
+MSG_CANDLE_DETAILS = "**Detail Candle (O/H/L/C)**:\n"
+MSG_PA = "🕯️ **Pola Candlestick**: "
+MSG_CHART = "📈 **Pola Chart**: \n"
+MSG_SMC = "🔄 **Struktur Pasar (SMC)**: "
+MSG_SUPPORT = "⬇️ **Support Levels**: "
+MSG_RESISTANCE = "⬆️ **Resistance Levels**: "
+MSG_MULTI_TF = "✅ **Konfirmasi Multi-TF**: "
+MSG_NOTHING_DETECTED = "Tidak ada pola atau informasi signifikan terdeteksi saat ini.\n"
+# Deskripsi pola chart, dikunci dengan nama persis yang dikembalikan detect_chart_patterns
+CP_DESC = {
+    "Double Top": "**Double Top**: Menunjukkan potensi pembalikan tren dari naik menjadi turun.",
+    "Double Bottom": "**Double Bottom**: Menunjukkan potensi pembalikan tren dari turun menjadi naik.",
+    "Head & Shoulders": "**Head & Shoulders**: Menunjukkan potensi pembalikan tren dari naik menjadi turun.",
+    "Inverse Head & Shoulders": "**Inverse Head & Shoulders**: Menunjukkan potensi pembalikan tren dari turun menjadi naik."
+}
+
+def _format_sr_levels(sr_levels: dict) -> tuple:
+    """
+    Menyiapkan level S/R untuk pesan: (nama, array level, baris daftar level) per sisi yang tidak kosong.
+    Ikut di-cache bersama hasil detektor sehingga daftar level hanya diformat ulang saat buffer berubah.
+    """
+    return tuple(
+        (name, np.asarray(sr_levels[side], dtype=np.float64), label + ", ".join([f"{v:.2f}" for v in sr_levels[side]]) + "\n")
+        for side, label, name in (("support", MSG_SUPPORT, "Support"), ("resistance", MSG_RESISTANCE, "Resistance"))
+        if sr_levels.get(side)
+    )
+
+def scan_timeframe(tf: str, current_candles_for_analysis: CandleBuffer, latest_candle: Candle,
+                   is_live_candle_being_processed: bool, current_price: float, all_tf_candles: dict) -> str:
+    """
+    Menjalankan semua detektor untuk satu timeframe dan menyusun bagian pesannya.
+    Dipanggil paralel per TF oleh scan_all_intervals_and_notify atas snapshot buffer yang dipin (all_tf_candles).
+    """
+    time_progress_for_live_candle = 0.0
+    average_volume_past = get_average_volume(current_candles_for_analysis)
+
+    if is_live_candle_being_processed: # Hanya hitung progress jika memang ini live candle
+        time_progress_for_live_candle = get_time_progress(int(current_candles_for_analysis.open_time[-1]) / 1000, tf)
+
+    # Hasil detektor hanya bergantung pada buffer TF ini: pakai ulang jika buffer tidak berubah sejak scan terakhir
+    cached = _ta_cache.get(tf)
+    if cached and cached[0] is current_candles_for_analysis and cached[1] == current_candles_for_analysis.version:
+        pa_patterns, cp_patterns, bos_choch_patterns, sr_levels = cached[2]
+    else:
+        pa_patterns = detect_price_action(current_candles_for_analysis, enable_volume_confirmation=False)
+        swings = get_all_swing_points(current_candles_for_analysis) # Satu sweep swing point untuk semua detektor
+        cp_patterns = detect_chart_patterns(current_candles_for_analysis, swings)
+        bos_choch_patterns = detect_bos_choch(current_candles_for_analysis, swings)
+        sr_levels = _format_sr_levels(detect_auto_sr(current_candles_for_analysis, swings=swings))
+        _ta_cache[tf] = (current_candles_for_analysis, current_candles_for_analysis.version,
+                         (pa_patterns, cp_patterns, bos_choch_patterns, sr_levels))
+
+    multi_tf_confirmations = get_multi_tf_confirmations(pa_patterns + cp_patterns + bos_choch_patterns, all_tf_candles, tf) # Buffer sudah memuat live candle
+
+    props = current_candles_for_analysis.props_at(-1)
+    candle_type = "Bullish" if props["is_bullish"] else "Bearish" if props["is_bearish"] else "Doji-like"
+    full_range_percent = (props["full_range"] / latest_candle.open) * 100 if latest_candle.open else 0
+
+    status_candle_tag = "[L]" if is_live_candle_being_processed else "[C]" # Ditentukan oleh is_live_candle_being_processed
+    status_candle_desc = "LIVE (Open)" if is_live_candle_being_processed else "FINAL (Closed)" # Ditentukan oleh is_live_candle_being_processed
+    time_progress_info = ""
+    live_candle_potential_info_msg = ""
+
+    if is_live_candle_being_processed: # Hanya tambahkan info progress jika ini live candle
+        time_progress_info = f" ({int(time_progress_for_live_candle*100)}% progress)"
+        live_candle_potential_info_msg = get_live_candle_potential_and_process(latest_candle, time_progress_for_live_candle, average_volume_past, props)
+
+    # Pesan disusun sebagai list potongan (masing-masing diakhiri newline) lalu di-join sekali di akhir
+    parts = [f"📊 **{tf.upper()} Timeframe** {status_candle_tag} ({status_candle_desc}{time_progress_info})\n"]
+
+    if status_candle_tag == "[C]": # Jika itu candle yang sudah tertutup
+        parts.append(f"**Waktu Penutupan Candle**: {_format_wib(latest_candle.close_time)} WIB\n")
+    else: # Jika itu candle live
+        parts.append(f"Waktu Pembukaan Candle: {_format_wib(latest_candle.time)} WIB\n")
+
+    parts.append(f"Tipe Candle: {candle_type} (Range: {full_range_percent:.2f}%)\n")
+    # Detail candle (akan selalu ditampilkan untuk final/live)
+    parts.append(
+        f"{MSG_CANDLE_DETAILS}"
+        f"   • Open: `{latest_candle.open:.2f}`\n"
+        f"   • High: `{latest_candle.high:.2f}`\n"
+        f"   • Low: `{latest_candle.low:.2f}`\n"
+        f"   • Close: `{latest_candle.close:.2f}`\n"
+        f"   • Volume: `{latest_candle.volume:.2f}`\n"
+        f"   • Body/Range Ratio: `{props['body_to_range_ratio']:.2f}`\n"
+        f"   • Upper Shadow/Range Ratio: `{props['upper_shadow_to_range_ratio']:.2f}`\n"
+        f"   • Lower Shadow/Range Ratio: `{props['lower_shadow_to_range_ratio']:.2f}`\n"
+    )
+    if live_candle_potential_info_msg:
+        parts.append(live_candle_potential_info_msg + "\n") # Tambah newline jika ada info live
+
+    detected_info_present = False
+
+    if pa_patterns: 
+        parts.append(MSG_PA + ", ".join(pa_patterns) + "\n")
+        detected_info_present = True
+
+    if cp_patterns:
+        parts.append(MSG_CHART + "".join([f"- {CP_DESC.get(pattern, pattern)}\n" for pattern in cp_patterns]))
+        detected_info_present = True
+
+    if bos_choch_patterns: 
+        parts.append(MSG_SMC + ", ".join(bos_choch_patterns) + "\n")
+        detected_info_present = True
+
+    for name, levels, levels_line in sr_levels:
+        parts.append(levels_line)
+        detected_info_present = True
+        near_levels = levels[np.abs(current_price - levels) / current_price < 0.005] # Dalam 0.5% dari S/R level
+        parts.extend([f"⚠️ Harga saat ini ({current_price:.2f}) mendekati {name} Level {level:.2f}\n" for level in near_levels.tolist()])
+
+    if multi_tf_confirmations: 
+        parts.append(MSG_MULTI_TF + ", ".join(multi_tf_confirmations) + "\n")
+        detected_info_present = True
+
+    # Diperbarui: Hanya tampilkan ini jika TIDAK ADA informasi yang terdeteksi sama sekali ATAU tidak ada info live
+    if not detected_info_present and not live_candle_potential_info_msg: 
+        parts.append(MSG_NOTHING_DETECTED)
+
+    return "".join(parts)
+
+def scan_all_intervals_and_notify(triggered_by_websocket_tfs: dict = None):
     """
     Memindai dan melaporkan pola untuk semua interval yang dikonfigurasi.
-    Menggunakan data historis yang di-cache + live candle dari WebSocket.
-    Mengirim satu notifikasi Discord yang menggabungkan semua informasi.
+    Menggunakan buffer candle yang di-cache (historis + live candle dari WebSocket).
+    Analisis per TF dijalankan paralel; hasilnya digabung sesuai urutan INTERVALS
+    menjadi satu notifikasi Discord.
     
     Args:
-        triggered_by_websocket_tf (str, optional): Timeframe yang memicu scan ini
-            karena candle-nya baru saja closed. None jika dipicu oleh timer.
+        triggered_by_websocket_tfs (dict, optional): {timeframe: close_time} untuk TF yang memicu scan ini
+            karena candle-nya baru saja closed. Kosong jika dipicu oleh timer.
     """
-    global _candle_data_cache, _live_websocket_candle_data, last_processed_final_candle_time
+    global _candle_data_cache, last_processed_final_candle_time
+    triggered_by_websocket_tfs = triggered_by_websocket_tfs or {}
 
     full_alert_message_parts = []
     current_price = None # Akan diisi dari candle terbaru dari salah satu TF
 
-    with data_cache_lock: # Pastikan akses ke cache aman
+    with _scan_lock, _pinned_snapshot() as snapshot: # Buffer dipin: on_message menulis ke salinan, bukan ke snapshot ini
+        jobs = [] # (posisi bagian pesan, tf, buffer, latest_candle, is_live)
+        analysis_candles = dict(snapshot) # Buffer yang dianalisis per TF; snapshot sendiri tetap utuh untuk un-pin
         for tf in INTERVALS:
-            # Prioritaskan live candle dari WebSocket jika ada dan belum final
-            latest_candle = _live_websocket_candle_data.get(tf)
-            is_live_candle_being_processed = False
-
-            if latest_candle and not latest_candle["is_final_bar"]:
-                # Gunakan live candle untuk analisis
-                current_candles_for_analysis = list(_candle_data_cache.get(tf, []))
-                # Pastikan live candle ada di akhir list untuk analisis
-                if not current_candles_for_analysis or latest_candle["time"] > current_candles_for_analysis[-1]["time"]:
-                    current_candles_for_analysis.append(latest_candle)
-                elif current_candles_for_analysis and latest_candle["time"] == current_candles_for_analysis[-1]["time"]:
-                    current_candles_for_analysis[-1] = latest_candle # Update jika sudah ada tapi belum final
-                
-                is_live_candle_being_processed = True
+            # Live candle dari WebSocket sudah ditulis ke slot terakhir buffer oleh on_message,
+            # jadi scan cukup membaca buffer tanpa penggabungan
+            current_candles_for_analysis = snapshot[tf]
+            if tf in triggered_by_websocket_tfs:
+                # Tick pertama candle berikutnya bisa masuk sebelum scan berjalan: analisis tetap berakhir di candle final pemicu
+                current_candles_for_analysis = analysis_candles[tf] = current_candles_for_analysis.through_close_time(triggered_by_websocket_tfs[tf])
+            if len(current_candles_for_analysis):
+                latest_candle = current_candles_for_analysis.candle_at(-1)
+                is_live_candle_being_processed = not latest_candle.is_final_bar
             else:
-                # Jika tidak ada live candle, atau live candle sudah final (misal baru saja close),
-                # gunakan candle terakhir dari cache historis
-                current_candles_for_analysis = list(_candle_data_cache.get(tf, []))
-                if current_candles_for_analysis:
-                    latest_candle = current_candles_for_analysis[-1]
-                else:
-                    latest_candle = None # Tidak ada data sama sekali
+                latest_candle = None # Tidak ada data sama sekali
+                is_live_candle_being_processed = False
 
             # Cek apakah notifikasi untuk candle final TF ini sudah dikirim dalam sesi ini
             if not is_live_candle_being_processed and latest_candle and \
-               latest_candle["is_final_bar"] and \
-               last_processed_final_candle_time[tf] == latest_candle["close_time"] and \
-               tf != triggered_by_websocket_tf: # Jangan skip jika ini TF yang baru closed dan trigger scan
+               latest_candle.is_final_bar and \
+               last_processed_final_candle_time[tf] == latest_candle.close_time and \
+               tf not in triggered_by_websocket_tfs: # Jangan skip jika ini TF yang baru closed dan trigger scan
                 # Logger.info(f"Skipping {tf} analysis. Final candle already processed or not the trigger.")
                 continue # Skip jika sudah diproses, kecuali jika ini TF yang baru memicu notifikasi
 
             if not latest_candle:
-                full_alert_message_parts.append(f"\n---\n📊 **{tf.upper()} Timeframe**: Tidak ada data candle tersedia.")
+                full_alert_message_parts.append(f"📊 **{tf.upper()} Timeframe**: Tidak ada data candle tersedia.")
                 continue
-                
-            time_progress_for_live_candle = 0.0
-            average_volume_past = get_average_volume(current_candles_for_analysis)
-
-            if is_live_candle_being_processed: # Hanya hitung progress jika memang ini live candle
-                time_progress_for_live_candle = get_time_progress(latest_candle["time"], tf)
             
             # Menyesuaikan kebutuhan minimum candle berdasarkan jenis analisis
             min_candles_needed = 3 # Default untuk PA dasar (1-3 candle)
@@ -683,233 +1196,315 @@ def scan_all_intervals_and_notify(triggered_by_websocket_tf: str = None):
                 min_candles_needed = 50
 
             if len(current_candles_for_analysis) < min_candles_needed:
-                full_alert_message_parts.append(f"\n---\n📊 **{tf.upper()} Timeframe**: Tidak cukup data untuk analisis lengkap. ({len(current_candles_for_analysis)}/{min_candles_needed} candles dibutuhkan)")
+                full_alert_message_parts.append(f"📊 **{tf.upper()} Timeframe**: Tidak cukup data untuk analisis lengkap. ({len(current_candles_for_analysis)}/{min_candles_needed} candles dibutuhkan)")
                 continue
 
             # latest_candle sudah ditentukan di atas
             if current_price is None:
-                current_price = latest_candle['close']
-
-            pa_patterns = detect_price_action(current_candles_for_analysis, enable_volume_confirmation=False)
-            cp_patterns = detect_chart_patterns(current_candles_for_analysis)
-            bos_choch_patterns = detect_bos_choch(current_candles_for_analysis)
-            sr_levels = detect_auto_sr(current_candles_for_analysis)
-
-            # Temp all tf data for multi-tf (pastikan ini juga pakai live candle jika tersedia)
-            temp_all_tf_data_for_multi_tf = {}
-            for _tf_check in INTERVALS:
-                _temp_live_c = _live_websocket_candle_data.get(_tf_check)
-                if _temp_live_c and not _temp_live_c["is_final_bar"]:
-                    _temp_candles = list(_candle_data_cache.get(_tf_check, []))
-                    if not _temp_candles or _temp_live_c["time"] > _temp_candles[-1]["time"]:
-                        _temp_candles.append(_temp_live_c)
-                    elif _temp_candles and _temp_live_c["time"] == _temp_candles[-1]["time"]:
-                        _temp_candles[-1] = _temp_live_c # Update live candle in temp list
-                    temp_all_tf_data_for_multi_tf[_tf_check] = _temp_candles
-                else:
-                    temp_all_tf_data_for_multi_tf[_tf_check] = list(_candle_data_cache.get(_tf_check, [])) # Gunakan cache jika tidak ada live/sudah final
-
-
-            multi_tf_confirmations = get_multi_tf_confirmations(pa_patterns + cp_patterns + bos_choch_patterns, temp_all_tf_data_for_multi_tf, tf)
-
-            props = get_candle_properties(latest_candle)
-            candle_type = "Bullish" if props["is_bullish"] else "Bearish" if props["is_bearish"] else "Doji-like"
-            full_range_percent = (props["full_range"] / latest_candle["open"]) * 100 if latest_candle["open"] else 0
-            
-            status_candle_tag = "[L]" if is_live_candle_being_processed else "[C]" # Ditentukan oleh is_live_candle_being_processed
-            status_candle_desc = "LIVE (Open)" if is_live_candle_being_processed else "FINAL (Closed)" # Ditentukan oleh is_live_candle_being_processed
-            time_progress_info = ""
-            live_candle_potential_info_msg = ""
-
-            # Detail candle (akan selalu ditampilkan untuk final/live)
-            candle_details = (
-                f"   • Open: `{latest_candle['open']:.2f}`\n"
-                f"   • High: `{latest_candle['high']:.2f}`\n"
-                f"   • Low: `{latest_candle['low']:.2f}`\n"
-                f"   • Close: `{latest_candle['close']:.2f}`\n"
-                f"   • Volume: `{latest_candle['volume']:.2f}`\n"
-                f"   • Body/Range Ratio: `{props['body_to_range_ratio']:.2f}`\n"
-                f"   • Upper Shadow/Range Ratio: `{props['upper_shadow_to_range_ratio']:.2f}`\n"
-                f"   • Lower Shadow/Range Ratio: `{props['lower_shadow_to_range_ratio']:.2f}`\n"
-            )
-
-            if is_live_candle_being_processed: # Hanya tambahkan info progress jika ini live candle
-                time_progress_info = f" ({int(time_progress_for_live_candle*100)}% progress)"
-                live_candle_potential_info_msg = get_live_candle_potential_and_process(latest_candle, time_progress_for_live_candle, average_volume_past)
-                
-            tf_msg_part = f"\n---\n📊 **{tf.upper()} Timeframe** {status_candle_tag} ({status_candle_desc}{time_progress_info})\n" \
-                        f"**Waktu Analisis**: {datetime.datetime.now(TARGET_TIMEZONE).strftime('%Y-%m-%d %H:%M:%S')} WIB\n"
-            
-            if status_candle_tag == "[C]": # Jika itu candle yang sudah tertutup
-                tf_msg_part += f"**Waktu Penutupan Candle**: {latest_candle['close_time'].astimezone(TARGET_TIMEZONE).strftime('%Y-%m-%d %H:%M:%S')} WIB\n"
-            else: # Jika itu candle live
-                tf_msg_part += f"Waktu Pembukaan Candle: {latest_candle['time'].astimezone(TARGET_TIMEZONE).strftime('%Y-%m-%d %H:%M:%S')} WIB\n"
+                current_price = latest_candle.close
 
+            full_alert_message_parts.append(None) # Diisi hasil analisis paralel di bawah
+            jobs.append((len(full_alert_message_parts) - 1, tf, current_candles_for_analysis, latest_candle, is_live_candle_being_processed))
 
-            tf_msg_part += f"Tipe Candle: {candle_type} (Range: {full_range_percent:.2f}%)\n" \
-                        f"**Detail Candle (O/H/L/C)**:\n{candle_details}" + \
-                        (live_candle_potential_info_msg + "\n" if live_candle_potential_info_msg else "") # Tambah newline jika ada info live
-
-            detected_info_present = False
-            
-            if pa_patterns: 
-                tf_msg_part += "🕯️ **Pola Candlestick**: " + ", ".join(pa_patterns) + "\n"
-                detected_info_present = True
-            
-            if cp_patterns:
-                cp_descriptions = []
-                for pattern in cp_patterns:
-                    if "Double Top" in pattern:
-                        cp_descriptions.append(f"**Double Top**: Menunjukkan potensi pembalikan tren dari naik menjadi turun.")
-                    elif "Double Bottom" in pattern:
-                        cp_descriptions.append(f"**Double Bottom**: Menunjukkan potensi pembalikan tren dari turun menjadi naik.")
-                    elif "Head & Shoulders" in pattern:
-                        cp_descriptions.append(f"**Head & Shoulders**: Menunjukkan potensi pembalikan tren dari naik menjadi turun.")
-                    elif "Inverse Head & Shoulders" in pattern:
-                        cp_descriptions.append(f"**Inverse Head & Shoulders**: Menunjukkan potensi pembalikan tren dari turun menjadi naik.")
-                    else:
-                        cp_descriptions.append(pattern)
-                tf_msg_part += "📈 **Pola Chart**: " + "\n" + "\n".join([f"- {desc}" for desc in cp_descriptions]) + "\n"
-                detected_info_present = True
-
-            if bos_choch_patterns: 
-                tf_msg_part += "🔄 **Struktur Pasar (SMC)**: " + ", ".join(bos_choch_patterns) + "\n"
-                detected_info_present = True
-            
-            sr_info_part = ""
-            if sr_levels.get("support"): 
-                sr_info_part += "⬇️ **Support Levels**: " + ", ".join([f"{v:.2f}" for v in sr_levels["support"]]) + "\n"
-                detected_info_present = True
-                for s_level in sr_levels["support"]:
-                    if abs(current_price - s_level) / current_price < 0.005: # Dalam 0.5% dari S/R level
-                        sr_info_part += f"⚠️ Harga saat ini ({current_price:.2f}) mendekati Support Level {s_level:.2f}\n"
-
-            if sr_levels.get("resistance"): 
-                sr_info_part += "⬆️ **Resistance Levels**: " + ", ".join([f"{v:.2f}" for v in sr_levels["resistance"]]) + "\n"
-                detected_info_present = True
-                for r_level in sr_levels["resistance"]:
-                    if abs(current_price - r_level) / current_price < 0.005: # Dalam 0.5% dari S/R level
-                        sr_info_part += f"⚠️ Harga saat ini ({current_price:.2f}) mendekati Resistance Level {r_level:.2f}\n"
-            tf_msg_part += sr_info_part
-
-            if multi_tf_confirmations: 
-                tf_msg_part += "✅ **Konfirmasi Multi-TF**: " + ", ".join(multi_tf_confirmations) + "\n"
-                detected_info_present = True
-            
-            # Diperbarui: Hanya tampilkan ini jika TIDAK ADA informasi yang terdeteksi sama sekali ATAU tidak ada info live
-            if not detected_info_present and not live_candle_potential_info_msg: 
-                tf_msg_part += "Tidak ada pola atau informasi signifikan terdeteksi saat ini.\n"
-
-            full_alert_message_parts.append(tf_msg_part)
+        # Analisis TF berjalan paralel (kernel Numba dan NumPy melepas GIL); tiap TF hanya mengubah cache buffernya sendiri
+        futures = [_scan_executor.submit(scan_timeframe, tf, candles, latest_candle, is_live, current_price, analysis_candles)
+                   for _, tf, candles, latest_candle, is_live in jobs]
+        for (position, tf, _, latest_candle, is_live), future in zip(jobs, futures):
+            full_alert_message_parts[position] = future.result()
 
             # Tandai candle ini sudah diproses jika ini adalah candle final yang memicu notifikasi
-            if not is_live_candle_being_processed and latest_candle["is_final_bar"] and tf == triggered_by_websocket_tf:
-                last_processed_final_candle_time[tf] = latest_candle["close_time"]
+            if not is_live and latest_candle.is_final_bar and tf in triggered_by_websocket_tfs:
+                last_processed_final_candle_time[tf] = latest_candle.close_time
 
     if full_alert_message_parts:
         header_price = f"**Harga Terakhir {SYMBOL}**: {current_price:.2f}\n" if current_price else ""
-        final_message = header_price + "\n".join(full_alert_message_parts)
-        send_discord_alert(f"📡 {SYMBOL} Real-time Market Update", final_message)
+        header = header_price + f"**Waktu Analisis**: {datetime.datetime.now(TARGET_TIMEZONE).strftime('%Y-%m-%d %H:%M:%S')} WIB\n"
+        # Satu POST untuk semua TF: header + satu embed per TF
+        send_discord_alert(f"📡 {SYMBOL} Real-time Market Update", header, full_alert_message_parts)
     else:
         logger.info("Tidak ada update yang signifikan untuk dikirim dalam ringkasan real-time.")
 
 
 # --- DISCORD ALERT ---
-def send_discord_alert(title: str, message: str):
-    """Mengirim notifikasi ke Discord via webhook."""
+DISCORD_MAX_EMBEDS = 10 # Batas embed per pesan webhook Discord
+DISCORD_MAX_DESCRIPTION = 4096 # Batas karakter description per embed
+DISCORD_MAX_MESSAGE_CHARS = 6000 # Batas total karakter (judul + description) semua embed dalam satu pesan
+ALERT_COALESCE_SECONDS = 0.5 # Jendela penggabungan alert yang berdekatan menjadi satu POST
+
+_alert_queue = queue.Queue() # Item: (digest, judul, list embed, lanjutan?) -- satu alert bisa terdiri dari beberapa item
+_last_alert_digest = None # Hash isi alert terakhir yang berhasil dikirim
+
+def send_discord_alert(title: str, message: str, sections: list = ()):
+    """
+    Mengantrekan notifikasi Discord; pengiriman dilakukan thread _discord_alert_worker sehingga scan tidak
+    menunggu network. Setiap item `sections` menjadi embed tersendiri; embed dibagi ke beberapa pesan agar
+    tiap pesan tetap dalam DISCORD_MAX_EMBEDS dan DISCORD_MAX_MESSAGE_CHARS.
+    Alert yang isinya sama dengan alert terakhir tidak dikirim ulang.
+    """
     if DISCORD_WEBHOOK == "https://discord.com/api/webhooks/1392182015884787832/OwTMcZHCnm7mB16c7ebATXzgNWe7QmiXtmKPBvVu7YpdRdzAXIHhqSqp8ou9moKg64Tm": # Masih pakai placeholder lama, bisa jadi lupa diganti
         logger.error("DISCORD_WEBHOOK belum diatur. Tidak dapat mengirim notifikasi. Harap ganti placeholder URL.")
         return
 
-    payload = {
-        "embeds": [
-            {
-                "title": title,
-                "description": message,
-                "color": 3447003, # Green for general alerts
-                "timestamp": datetime.datetime.utcnow().isoformat() # Discord timestamp is always UTC
-            }
-        ]
-    }
+    # Waktu analisis di header selalu berubah, jadi dedupe memakai judul + isi per TF (atau pesan jika tanpa section)
+    digest = hashlib.blake2b(orjson.dumps([title, *sections] if sections else [title, message]), digest_size=8).hexdigest()
+    embeds = [
+        {
+            "title": title,
+            "description": _clip_description(message),
+            "color": 3447003, # Green for general alerts
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat() # Discord timestamp is always UTC
+        }
+    ] + [{"description": _clip_description(section), "color": 3447003} for section in sections]
+
+    # Bagi embed berurutan ke beberapa pesan; memotong description hanya jika satu embed sendiri melebihi batas
+    parts, part, part_chars = [], [], 0
+    for embed in embeds:
+        embed_chars = _embed_chars((embed,))
+        if part and (len(part) == DISCORD_MAX_EMBEDS or part_chars + embed_chars > DISCORD_MAX_MESSAGE_CHARS):
+            parts.append(part)
+            part, part_chars = [], 0
+        part.append(embed)
+        part_chars += embed_chars
+    parts.append(part)
+    for i, part in enumerate(parts):
+        _alert_queue.put((digest, title if len(parts) == 1 else f"{title} ({i + 1}/{len(parts)})", part, i > 0))
+
+def _clip_description(text: str) -> str:
+    """Memotong description yang melebihi batas Discord agar webhook tidak menolak seluruh pesan."""
+    if len(text) <= DISCORD_MAX_DESCRIPTION:
+        return text
+    logger.warning(f"Description embed Discord dipotong dari {len(text)} ke {DISCORD_MAX_DESCRIPTION} karakter.")
+    return text[:DISCORD_MAX_DESCRIPTION - 1] + "…"
+
+def _embed_chars(embeds: list) -> int:
+    return sum(len(embed.get("title", "")) + len(embed["description"]) for embed in embeds)
+
+def _post_discord_embeds(titles: list, embeds: list) -> bool:
     try:
-        requests.post(DISCORD_WEBHOOK, data=json.dumps(payload), headers={"Content-Type": "application/json"}, timeout=5)
-        logger.info(f"Alert Discord terkirim: {title}")
+        response = _session.post(DISCORD_WEBHOOK, data=orjson.dumps({"embeds": embeds}), headers={"Content-Type": "application/json"}, timeout=REST_TIMEOUT)
+        response.raise_for_status()
+        logger.info(f"Alert Discord terkirim: {', '.join(titles)}")
+        return True
     except requests.exceptions.RequestException as e:
         logger.error(f"Error sending Discord alert: {e}")
+        return False
+
+def _discord_alert_worker():
+    """
+    Mengosongkan _alert_queue: alert yang datang dalam ALERT_COALESCE_SECONDS digabung ke satu POST
+    selama total embed <= DISCORD_MAX_EMBEDS dan total karakter <= DISCORD_MAX_MESSAGE_CHARS,
+    lalu dikirim lewat session keep-alive.
+    """
+    global _last_alert_digest
+    pending = None
+    skipped_digest = None # Alert yang bagian pertamanya dilewati: bagian lanjutannya ikut dilewati
+    while True:
+        item = pending or _alert_queue.get()
+        pending = None
+        batch = [item]
+        embed_count = len(item[2])
+        char_count = _embed_chars(item[2])
+        deadline = time.monotonic() + ALERT_COALESCE_SECONDS
+        while (remaining := deadline - time.monotonic()) > 0:
+            try:
+                item = _alert_queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            item_chars = _embed_chars(item[2])
+            if embed_count + len(item[2]) > DISCORD_MAX_EMBEDS or char_count + item_chars > DISCORD_MAX_MESSAGE_CHARS:
+                pending = item # Tidak muat: jadi awal batch berikutnya
+                break
+            batch.append(item)
+            embed_count += len(item[2])
+            char_count += item_chars
+
+        titles, embeds = [], []
+        for digest, title, item_embeds, continued in batch:
+            if continued:
+                if digest == skipped_digest:
+                    continue
+            elif digest == _last_alert_digest:
+                logger.info(f"Alert Discord dilewati (isi sama dengan alert sebelumnya): {title}")
+                skipped_digest = digest
+                continue
+            else:
+                _last_alert_digest = digest
+                if skipped_digest == digest:
+                    skipped_digest = None
+            titles.append(title)
+            embeds.extend(item_embeds)
+        if embeds and not _post_discord_embeds(titles, embeds):
+            _last_alert_digest = None # Gagal terkirim: alert yang sama boleh dicoba lagi
+        for _ in batch:
+            _alert_queue.task_done()
 
 # --- WEBSOCKET HANDLERS ---
+_ws_stop = threading.Event() # Set oleh stop_websocket_client untuk menghentikan loop reconnect (shutdown bersih)
+_ws_app = None # Koneksi WebSocket aktif; ditutup oleh stop_websocket_client
+_ws_messages_received = 0 # Penghitung pesan; dipakai loop reconnect untuk mereset backoff
+SCAN_COALESCE_SECONDS = 0.5 # Jendela penggabungan candle final beberapa TF menjadi satu scan
+_scan_queue = queue.Queue() # Item: (interval, (close_time, refetch)) untuk candle final yang perlu di-scan
+
 def on_open(ws):
     logger.info("Connected to Binance WebSocket.")
-    streams = [f"{SYMBOL.lower()}@kline_{interval}" for interval in INTERVALS]
-    subscribe_message = {
-        "method": "SUBSCRIBE",
-        "params": streams,
-        "id": 1
-    }
-    ws.send(json.dumps(subscribe_message))
-    logger.info(f"Subscribed to streams: {', '.join(streams)}")
+    # Stream sudah dipilih lewat URL combined stream, tidak perlu pesan SUBSCRIBE terpisah
+    logger.info(f"Subscribed to streams: {', '.join(KLINE_STREAMS)}")
 
 def on_message(ws, message):
-    global _live_websocket_candle_data, _candle_data_cache, last_processed_final_candle_time
+    global _candle_data_cache, last_processed_final_candle_time, _ws_messages_received
+    _ws_messages_received += 1
 
-    data = json.loads(message)
+    data = orjson.loads(message) # bytes mentah: dengan skip_utf8_validation websocket-client tidak men-decode frame teks
+    data = data.get("data", data) # Combined stream membungkus event: {"stream": ..., "data": {...}}
     if "k" in data: # Klines event
         kline_data = data["k"]
         interval = kline_data["i"]
-        
-        current_candle = {
-            "time": datetime.datetime.fromtimestamp(kline_data["t"] / 1000, tz=pytz.utc), # Waktu pembukaan (UTC)
-            "open": float(kline_data["o"]),
-            "high": float(kline_data["h"]),
-            "low": float(kline_data["l"]),
-            "close": float(kline_data["c"]),
-            "volume": float(kline_data["v"]),
-            "close_time": datetime.datetime.fromtimestamp(kline_data["T"] / 1000, tz=pytz.utc), # Waktu penutupan yg diharapkan (UTC)
-            "is_final_bar": kline_data["x"] # 'x' indicates if this candle is closed
-        }
+        close = float(kline_data["c"])
+        volume = float(kline_data["v"])
+        is_final_bar = kline_data["x"] # 'x' indicates if this candle is closed
         
         with data_cache_lock: # Amankan akses ke cache saat update
-            _live_websocket_candle_data[interval] = current_candle
+            candles = _candle_data_cache[interval]
+            if candles.readers: # Buffer sedang dibaca scan: tulis ke salinan agar snapshot scan tetap konsisten
+                candles = _candle_data_cache[interval] = candles.copy()
+            # Tulis langsung ke buffer: timpa slot live terakhir, atau tambah slot baru untuk candle baru
+            candles.upsert(
+                kline_data["t"], float(kline_data["o"]), float(kline_data["h"]), float(kline_data["l"]), close,
+                volume, kline_data["T"], is_final_bar # Waktu pembukaan/penutupan dalam epoch ms (UTC)
+            )
 
-            if current_candle["is_final_bar"]:
-                # Periksa apakah candle ini sudah pernah diproses sebagai final
-                if last_processed_final_candle_time[interval] is None or \
-                current_candle["close_time"] > last_processed_final_candle_time[interval]:
+            if is_final_bar:
+                close_time = kline_data["T"] # Epoch ms: dibandingkan langsung sebagai int
+                # Periksa apakah candle ini sudah pernah diproses sebagai final (atau sedang diproses)
+                if interval not in _final_refresh_pending and \
+                (last_processed_final_candle_time[interval] is None or close_time > last_processed_final_candle_time[interval]):
                     
-                    logger.info(f"[{interval.upper()}] Candle DITUTUP (FINAL). Memperbarui data historis dari REST API dan memicu scan.")
-                    # Perbarui cache historis dengan data REST API untuk keakuratan
-                    _candle_data_cache[interval] = get_klines_rest(SYMBOL, interval, CANDLE_LIMIT[interval])
-                    # PENTING: Panggil scan_all_intervals_and_notify dengan parameter agar tahu TF mana yang trigger
-                    threading.Thread(target=scan_all_intervals_and_notify, args=(interval,)).start()
+                    # Candle final sudah masuk ke buffer lewat upsert; REST hanya diperlukan jika ada celah
+                    refetch = _needs_full_refresh(candles, interval)
+                    if refetch:
+                        logger.info(f"[{interval.upper()}] Candle DITUTUP (FINAL). Celah data terdeteksi, memperbarui data historis dari REST API dan memicu scan.")
+                    else:
+                        logger.info(f"[{interval.upper()}] Candle DITUTUP (FINAL). Memicu scan.")
+                    # REST + scan berjalan di worker terpisah agar thread WebSocket tidak tertahan I/O
+                    _final_refresh_pending.add(interval)
+                    _scan_queue.put((interval, (close_time, refetch)))
                 else:
                     logger.debug(f"[{interval.upper()}] Candle FINAL diterima tetapi sudah diproses sebelumnya.")
             else:
-                logger.debug(f"[{interval.upper()}] Candle LIVE diperbarui. Harga: {current_candle['close']:.2f}, Volume: {current_candle['volume']:.2f}")
+                # Argumen lazy: string log tidak diformat untuk setiap tick selama level DEBUG nonaktif
+                logger.debug("[%s] Candle LIVE diperbarui. Harga: %.2f, Volume: %.2f", interval.upper(), close, volume)
 
     elif "result" in data:
         logger.info(f"WebSocket result: {data}")
     elif "error" in data:
         logger.error(f"WebSocket error: {data}")
 
+def _needs_full_refresh(buffer: CandleBuffer, interval: str) -> bool:
+    """
+    True jika candle final terakhir tidak menyambung dengan candle sebelumnya (mis. tick terlewat
+    saat reconnect) sehingga buffer perlu diambil ulang dari REST API.
+    """
+    if len(buffer) < 2:
+        return True
+    step_ms = _INTERVAL_SECONDS[interval] * 1000
+    return buffer.open_time[-1] - buffer.open_time[-2] != step_ms or not buffer.is_final[-2]
+
+def refresh_and_scan(refetch_by_interval: dict):
+    """
+    Dipanggil saat candle satu atau beberapa TF ditutup ({interval: (close_time, refetch)}): TF dengan refetch
+    diambil ulang dari REST API secara paralel (tanpa memegang data_cache_lock selama request), lalu semua TF
+    tersebut dipindai dalam satu scan hingga candle final dengan close_time tersebut.
+    """
+    triggered = {interval: close_time for interval, (close_time, _) in refetch_by_interval.items()}
+    try:
+        fetches = {interval: _rest_executor.submit(get_klines_rest, SYMBOL, interval, CANDLE_LIMIT[interval])
+                   for interval, (_, refetch) in refetch_by_interval.items() if refetch}
+        for interval, fetch in fetches.items():
+            try:
+                candles = fetch.result()
+            except Exception as e:
+                logger.error(f"[{interval.upper()}] Gagal memperbarui data setelah candle ditutup: {e}")
+                del triggered[interval]
+                continue
+            with data_cache_lock:
+                _candle_data_cache[interval] = candles
+        if triggered:
+            # PENTING: Panggil scan_all_intervals_and_notify dengan parameter agar tahu TF mana yang trigger
+            scan_all_intervals_and_notify(triggered)
+    except Exception as e:
+        logger.error(f"[{', '.join(tf.upper() for tf in refetch_by_interval)}] Gagal memindai setelah candle ditutup: {e}")
+    finally:
+        with data_cache_lock:
+            _final_refresh_pending.difference_update(refetch_by_interval)
+
+def _final_scan_worker():
+    """
+    Mengosongkan _scan_queue: candle final beberapa TF yang ditutup dalam SCAN_COALESCE_SECONDS
+    (mis. 1h dan 4h pada batas 4 jam) digabung menjadi satu refresh + satu scan, bukan satu scan per TF.
+    """
+    while True:
+        batch = [_scan_queue.get()]
+        deadline = time.monotonic() + SCAN_COALESCE_SECONDS
+        while (remaining := deadline - time.monotonic()) > 0:
+            try:
+                batch.append(_scan_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        refresh_and_scan(dict(batch))
+        for _ in batch:
+            _scan_queue.task_done()
+
 def on_error(ws, error):
     logger.error(f"WebSocket error: {error}")
 
 def on_close(ws, close_status_code, close_msg):
-    logger.warning(f"WebSocket closed. Code: {close_status_code}, Message: {close_msg}. Reconnecting in 5 seconds...")
-    time.sleep(5)
-    run_websocket_client()
+    # Reconnect ditangani oleh loop di run_websocket_client (tanpa rekursi dari callback)
+    logger.warning(f"WebSocket closed. Code: {close_status_code}, Message: {close_msg}.")
 
 def run_websocket_client():
-    """Menjalankan klien WebSocket Binance."""
-    ws_app = websocket.WebSocketApp(
-        BINANCE_WS_URL,
-        on_open=on_open,
-        on_message=on_message,
-        on_error=on_error,
-        on_close=on_close
-    )
-    # Ping interval lebih rendah untuk memastikan koneksi tetap hidup
-    ws_app.run_forever(ping_interval=20, ping_timeout=10)
+    """
+    Menjalankan klien WebSocket Binance dan menyambung ulang saat koneksi putus, dengan backoff
+    eksponensial (WS_RECONNECT_MIN_SECONDS s/d WS_RECONNECT_MAX_SECONDS). Backoff kembali ke minimum
+    jika koneksi sebelumnya sempat menerima pesan. Berhenti saat stop_websocket_client dipanggil.
+    """
+    global _ws_app
+    backoff = WS_RECONNECT_MIN_SECONDS
+    while not _ws_stop.is_set():
+        messages_before = _ws_messages_received
+        ws_app = _ws_app = websocket.WebSocketApp(
+            f"{BINANCE_WS_URL}?streams={'/'.join(KLINE_STREAMS)}",
+            on_open=on_open,
+            on_message=on_message,
+            on_error=on_error,
+            on_close=on_close
+        )
+        try:
+            # Ping interval lebih rendah untuk memastikan koneksi tetap hidup; stream Binance adalah JSON
+            # tepercaya sehingga validasi UTF-8 per frame (loop Python di websocket-client) dilewati
+            ws_app.run_forever(sockopt=WS_SOCKET_OPTIONS, ping_interval=20, ping_timeout=10, skip_utf8_validation=True)
+        except Exception as e:
+            logger.error(f"WebSocket client berhenti karena error: {e}")
+        if _ws_stop.is_set():
+            break
+        if _ws_messages_received != messages_before: # Koneksi terakhir sehat: mulai backoff dari awal
+            backoff = WS_RECONNECT_MIN_SECONDS
+        logger.warning(f"Menyambung ulang WebSocket dalam {backoff} detik...")
+        _ws_stop.wait(backoff)
+        backoff = min(backoff * 2, WS_RECONNECT_MAX_SECONDS)
+
+def stop_websocket_client():
+    """Menghentikan loop reconnect run_websocket_client dan menutup koneksi yang sedang berjalan."""
+    _ws_stop.set()
+    if _ws_app is not None:
+        _ws_app.close()
+
+def start_workers():
+    """
+    Menjalankan thread latar belakang (pengirim alert Discord dan scan candle final). Dipanggil dari runner,
+    bukan saat modul di-import, agar import main.py tidak memulai thread.
+    """
+    threading.Thread(target=_discord_alert_worker, name="discord-alert", daemon=True).start()
+    threading.Thread(target=_final_scan_worker, name="final-scan", daemon=True).start()
 
 # --- RUNNER ---
 if __name__ == "__main__":
@@ -919,14 +1514,17 @@ if __name__ == "__main__":
         exit(1)
         
     logger.info("Bot pemantau harga dimulai. Mengambil data historis awal...")
+    start_workers()
     
+    # Semua TF diambil paralel: waktu startup ~ satu RTT terlama, bukan jumlah semua RTT
+    initial_fetches = {tf: _rest_executor.submit(get_klines_rest, SYMBOL, tf, CANDLE_LIMIT[tf]) for tf in INTERVALS}
     with data_cache_lock: # Kunci saat inisialisasi cache
-        for tf in INTERVALS:
+        for tf, fetch in initial_fetches.items():
             try:
-                initial_candles = get_klines_rest(SYMBOL, tf, CANDLE_LIMIT[tf])
+                initial_candles = fetch.result()
                 if initial_candles:
                     _candle_data_cache[tf] = initial_candles
-                    last_processed_final_candle_time[tf] = initial_candles[-1]["close_time"]
+                    last_processed_final_candle_time[tf] = initial_candles.candle_at(-1).close_time
                     logger.info(f"Data historis {tf.upper()} berhasil dimuat. {len(initial_candles)} candle.")
                 else:
                     logger.error(f"Gagal memuat data historis untuk {tf}. Bot mungkin tidak berfungsi dengan baik.")
@@ -941,14 +1539,19 @@ if __name__ == "__main__":
     ws_thread.daemon = True # Daemon thread akan berhenti ketika program utama berhenti
     ws_thread.start()
 
-    logger.info("Memberi sedikit waktu untuk WebSocket terhubung dan menerima data live pertama.")
-    time.sleep(5)
-
-    logger.info("Memicu analisis awal dan mengirim notifikasi Discord pertama.")
-    scan_all_intervals_and_notify() # Panggil tanpa trigger_tf untuk inisialisasi
-
-    logger.info(f"Memulai loop analisis cadangan dan live candle setiap {REAL_TIME_SCAN_INTERVAL_SECONDS / 60} menit.")
-    while True:
-        time.sleep(REAL_TIME_SCAN_INTERVAL_SECONDS)
-        logger.info(f"Memicu analisis live candle dan cadangan pada interval {REAL_TIME_SCAN_INTERVAL_SECONDS / 60} menit.")
-        scan_all_intervals_and_notify() # Panggil tanpa trigger_tf untuk scan berkala
+    try:
+        logger.info("Memberi sedikit waktu untuk WebSocket terhubung dan menerima data live pertama.")
+        time.sleep(5)
+
+        logger.info("Memicu analisis awal dan mengirim notifikasi Discord pertama.")
+        scan_all_intervals_and_notify() # Panggil tanpa trigger_tf untuk inisialisasi
+
+        logger.info(f"Memulai loop analisis cadangan dan live candle setiap {REAL_TIME_SCAN_INTERVAL_SECONDS / 60} menit.")
+        while True:
+            time.sleep(REAL_TIME_SCAN_INTERVAL_SECONDS)
+            logger.info(f"Memicu analisis live candle dan cadangan pada interval {REAL_TIME_SCAN_INTERVAL_SECONDS / 60} menit.")
+            scan_all_intervals_and_notify() # Panggil tanpa trigger_tf untuk scan berkala
+    except KeyboardInterrupt:
+        logger.info("Bot dihentikan. Menutup koneksi WebSocket...")
+        stop_websocket_client()
+        ws_thread.join(timeout=5)